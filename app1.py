@@ -1,12 +1,24 @@
 import streamlit as st
-import pandas as pd
-import io
 import time
 import pickle
+import json
+import tempfile
 import os
-import random
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from quiz_utils import normalize_text, normalize_answer, parse_options_zen
+from quiz_utils import normalize_answer, build_questions, detect_columns, detect_key_column
+from bank_store import BankFormatError, BankHolder, BankRegistry, collect_bank_files, compile_bank
+from bank_update import diff_bank, updated_questions, apply_to_progress
+from progress import (BankProgress, new_progress, new_exam, dump_progress, load_progress, add_wrong,
+                      clear_wrong)
+from grading import grade_page
+from exam import EXAM_CODES, new_seed, draw_stratified, exam_score
+from exporter import (EXPORT_FORMATS, MIME_TYPES, BANK_HEADER, RESULT_HEADER, WRONG_HEADER,
+                      export_to_file, prune_exports, bank_rows, result_rows, wrong_rows)
+from study_set import MergedView, new_study_set, drop_member
+from stats import TYPE_NAME, TYPE_HEADER, SESSION_HEADER, export_stats_csv, export_stats_xlsx
 
 # --- 1. 核心配置 ---
 st.set_page_config(
@@ -264,161 +276,600 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-DATA_FILE = "user_data_v18.pkl"
+DATA_DIR = os.environ.get("ZEN_DATA_DIR", ".")
+DATA_FILE = os.path.join(DATA_DIR, "user_data_v19.json")
+LEGACY_DATA_FILE = os.path.join(DATA_DIR, "user_data_v18.pkl")  # 旧版 pickle 状态，仅在首次启动时迁移
+PROGRESS_DIR = os.path.join(DATA_DIR, "progress")  # 每个题库一个进度文件，作答时只重写当前题库的
+BANK_DIR = os.path.join(DATA_DIR, "banks")  # 编译后的题库文件 (内容寻址，mmap 只读打开)
+EXPORT_DIR = os.path.join(DATA_DIR, "exports")  # 导出临时文件，超过 EXPORT_MAX_AGE 秒后清理
+EXPORT_MAX_AGE = 3600
+BANK_GC_GRACE = 3600  # 未被引用的题库文件至少保留这么久 (秒)，以免删掉其他会话刚编译、尚未保存的文件
+FEEDBACK_DELAY = float(os.environ.get("ZEN_FEEDBACK_DELAY", "1"))  # 反馈停留时间倍率，压测时设为 0
+COMPRESS_BANKS = False  # 题库文件按块 zstd 压缩 (需要 zstandard)
+ALL_SHEETS = "全部 (按章节)"  # 更新题库时整本工作簿合并为章节的选项
+PARALLEL_PARSE_ROWS = 20_000  # 多表工作簿总行数达到此值才用多进程解析 (进程启动约需数百毫秒)
 
 # --- 3. 逻辑函数 ---
 # Core parsing functions are imported from quiz_utils module
+# pandas (及其 xlsxwriter/openpyxl 引擎) 只在导入/导出时按需加载，刷题路径不依赖它
 
 
-def process_excel(file):
-    """Process Excel file and extract questions. Returns (questions_list, error_message)."""
+def _sheet_columns(df):
+    """Detect the question columns of one sheet.
+
+    Returns (build_questions keyword arguments: types/contents/answers/keys, error_message).
+    """
+    df.columns = [str(c).strip() for c in df.columns]
+    cols, missing_cols = detect_columns(df.columns)
+    if missing_cols:
+        return None, f"缺少必要列: {', '.join(missing_cols)}。可用列: {', '.join(df.columns)}"
+    col_key = detect_key_column(df.columns, exclude=cols)
+    # Safely fill NA values
+    types, contents, answers = [df[c].fillna("").astype(str).tolist() for c in cols]
+    keys = df[col_key].fillna("").astype(str).tolist() if col_key else None
+    return {"types": types, "contents": contents, "answers": answers, "keys": keys}, None
+
+
+def process_excel(file, lazy=False, sheet_name=0):
+    """Process one sheet of an Excel file (the first by default). Returns (questions_list, error_message).
+
+    Only ``sheet_name`` is read. With ``lazy`` options are left unparsed until a question
+    is shown (see build_questions).
+    """
+    import pandas as pd
+
     try:
-        df = pd.read_excel(file)
+        df = pd.read_excel(file, sheet_name=sheet_name)
         if df.empty:
             return None, "Excel文件为空"
-        
-        df.columns = [str(c).strip() for c in df.columns]
-
-        def find_col(kws):
-            """Find column by keywords (case-insensitive)."""
-            for c in df.columns:
-                c_lower = c.lower()
-                for kw in kws:
-                    if kw.lower() in c_lower:
-                        return c
-            return None
-
-        col_type = find_col(['类型', 'Type', '题型', 'type', 'kind'])
-        col_content = find_col(['内容', 'Content', '题目', '问题', 'question', 'content'])
-        col_answer = find_col(['答案', 'Answer', '结果', '正确答案', 'answer', 'result'])
-        
-        missing_cols = []
-        if not col_type:
-            missing_cols.append("类型/Type/题型")
-        if not col_content:
-            missing_cols.append("内容/Content/题目")
-        if not col_answer:
-            missing_cols.append("答案/Answer/结果")
-        
-        if missing_cols:
-            return None, f"缺少必要列: {', '.join(missing_cols)}。可用列: {', '.join(df.columns)}"
 
-        # Safely fill NA values
-        df[col_type] = df[col_type].fillna("").astype(str)
-        df[col_content] = df[col_content].fillna("").astype(str)
-        df[col_answer] = df[col_answer].fillna("").astype(str)
+        columns, err = _sheet_columns(df)
+        if err:
+            return None, err
 
-        questions = []
-        records = df.to_dict('records')
-        total_rows = len(records)
-        
-        if total_rows == 0:
-            return None, "Excel文件中没有数据行"
-            
         progress_bar = st.progress(0)
-        skipped_count = 0
-
-        for i, row in enumerate(records):
-            try:
-                if i % (max(1, total_rows // 10)) == 0:
-                    progress_bar.progress((i + 1) / total_rows)
-                
-                raw_type = normalize_text(row.get(col_type, "")).upper()
-                raw_content = row.get(col_content, "")
-                raw_answer = row.get(col_answer, "")
-                
-                # Skip empty rows
-                if not raw_content or not raw_content.strip():
-                    skipped_count += 1
-                    continue
-
-                # Determine question type with expanded keywords
-                if any(x in raw_type for x in ['AO', '判断', 'TRUE', 'FALSE', 'TF', '对错', '是非']):
-                    q_code, q_name = 'AO', '判断题'
-                elif any(x in raw_type for x in ['BO', '单选', 'SINGLE', '单项', 'RADIO']):
-                    q_code, q_name = 'BO', '单选题'
-                elif any(x in raw_type for x in ['CO', '多选', 'MULTI', '多项', 'CHECKBOX']):
-                    q_code, q_name = 'CO', '多选题'
-                else:
-                    q_code, q_name = 'UNK', '未知'
-
-                q_text, q_options = parse_options_zen(raw_content)
-                
-                # Normalize answer (works for all question types)
-                normalized_answer = normalize_answer(raw_answer)
-                
-                if q_code in ['BO', 'CO'] and not q_options:
-                    q_options = {}
-                    
-                questions.append({
-                    "id": i, "code": q_code, "type": q_name,
-                    "content": q_text, "options": q_options, "answer": normalized_answer,
-                    "user_answer": None, "raw_content": raw_content
-                })
-            except Exception as row_error:
-                # Skip problematic rows but continue processing
-                skipped_count += 1
-                continue
-        
+        questions, skipped_count = build_questions(
+            **columns, on_progress=lambda done, total: progress_bar.progress(done / total), lazy=lazy)
         progress_bar.empty()
-        
+
         if not questions:
             return None, f"未能解析出任何有效题目 (跳过了 {skipped_count} 行)"
-        
+
         return questions, None
     except Exception as e:
         return None, f"解析错误: {str(e)}"
 
 
-def export_wrong_questions(q_list):
-    """Export wrong questions to Excel format."""
-    if not q_list:
-        return None
-    data = []
-    for q in q_list:
-        data.append({
-            "题目类型": q.get('type', '未知'),
-            "题目内容": q.get('raw_content', ''),
-            "正确答案": q.get('answer', ''),
-            "你的误选": q.get('user_answer', '')
-        })
-    df = pd.DataFrame(data)
-    out = io.BytesIO()
+def workbook_sheets(file):
+    """Sheet names of an uploaded workbook ([] if it cannot be opened); the sheets are not parsed."""
+    import pandas as pd
+
     try:
-        with pd.ExcelWriter(out, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False)
-        return out.getvalue()
+        with pd.ExcelFile(file) as book:
+            return list(book.sheet_names)
     except Exception:
-        return None
+        return []
+    finally:
+        file.seek(0)
+
+
+def bank_sheet(bank_name, sheets):
+    """The sheet a "每表一库" bank was imported from (named ``{base}_{sheet}``), or None."""
+    matches = [s for s in sheets if bank_name.endswith(f"_{s}")]
+    return max(matches, key=len) if matches else None
+
+
+def process_workbook(file, as_chapters=False, lazy=False):
+    """Process every sheet of a workbook. Returns ({sheet_name: questions_list}, error_message, skipped_sheets).
+
+    The workbook is read once and column detection runs per sheet. Parsing is pure Python
+    and holds the GIL, so large multi-sheet workbooks (PARALLEL_PARSE_ROWS rows or more)
+    are parsed one sheet per worker process; smaller ones in-process. With ``as_chapters`` every question is tagged with its sheet name and
+    ids are offset per sheet so the sheets can be merged into one bank. ``lazy`` is
+    passed through to build_questions.
+    """
+    import pandas as pd
+
+    try:
+        frames = pd.read_excel(file, sheet_name=None)
+    except Exception as e:
+        return None, f"解析错误: {str(e)}", []
+
+    jobs, skipped_sheets = {}, []
+    id_offset = 0
+    for name, df in frames.items():
+        if df.empty:
+            skipped_sheets.append(f"{name}: 空表")
+            continue
+        columns, err = _sheet_columns(df)
+        if err:
+            skipped_sheets.append(f"{name}: {err}")
+            continue
+        jobs[name] = (columns, id_offset)
+        if as_chapters:
+            id_offset += len(df)
+    if not jobs:
+        return None, "没有可导入的工作表", skipped_sheets
+
+    kwargs = {name: dict(columns, id_offset=offset, chapter=name if as_chapters else None, lazy=lazy)
+              for name, (columns, offset) in jobs.items()}
+    total_rows = sum(len(columns["contents"]) for columns, _ in jobs.values())
+    workers = min(len(jobs), os.cpu_count() or 1)
+    results = {}
+    progress_bar = st.progress(0)
+    if workers > 1 and total_rows >= PARALLEL_PARSE_ROWS:
+        # spawn: the Streamlit server is multi-threaded, which makes fork unsafe
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {pool.submit(build_questions, **kw): name for name, kw in kwargs.items()}
+            for done, fut in enumerate(as_completed(futures), 1):
+                results[futures[fut]] = fut.result()[0]
+                progress_bar.progress(done / len(futures))
+    else:
+        for done, (name, kw) in enumerate(kwargs.items(), 1):
+            results[name] = build_questions(**kw)[0]
+            progress_bar.progress(done / len(kwargs))
+    progress_bar.empty()
+
+    # Keep workbook sheet order
+    sheets = {}
+    for name in jobs:
+        if results[name]:
+            sheets[name] = results[name]
+        else:
+            skipped_sheets.append(f"{name}: 未能解析出任何有效题目")
+    if not sheets:
+        return None, "未能解析出任何有效题目", skipped_sheets
+    return sheets, None, skipped_sheets
+
+
+def prepare_export(key, fmt, header, rows, tag=None):
+    """Stream ``rows`` into an export file under EXPORT_DIR and remember it under ``key``, replacing the previous one.
+
+    Files left behind by ended sessions are removed by age on every export.
+    """
+    old = st.session_state.get(key)
+    if old:
+        try:
+            os.remove(old['path'])
+        except OSError:
+            pass
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    prune_exports(EXPORT_DIR, EXPORT_MAX_AGE)
+    st.session_state[key] = {"path": export_to_file(fmt, header, rows, EXPORT_DIR), "fmt": fmt, "tag": tag}
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def export_download(container, key, label, base_name):
+    """Offer the export file stored under ``key`` for download.
 
+    ``data`` is a callable, so the file is read only when the button is clicked; reruns that
+    merely show the button do not read or hash the export.
+    """
+    exp = st.session_state.get(key)
+    if not exp or not os.path.exists(exp['path']):
+        return
+    path = exp['path']
+    container.download_button(label, lambda: read_file(path), f"{base_name}.{exp['fmt']}",
+                              mime=MIME_TYPES[exp['fmt']], use_container_width=True)
 
-def save_state():
+
+def progress_file(name):
+    """Progress file of bank ``name`` (hashed: bank names may contain any character)."""
+    return os.path.join(PROGRESS_DIR, hashlib.sha1(name.encode("utf-8")).hexdigest()[:20] + ".json")
+
+
+def write_json(path, data):
+    """Write ``data`` to ``path`` atomically (temporary file + rename)."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def save_state(*changed):
+    """Persist the session: the small state file, plus the progress of the banks named in ``changed``.
+
+    The state file holds bank references, filters and study sets only; each bank's progress
+    has its own file and is rewritten only when that bank changed, so an answer costs one
+    bank's progress rather than every bank's.
+    """
     data = {
-        "banks": st.session_state.banks,
-        "progress": st.session_state.progress,
+        "bank_files": {name: os.path.basename(b.path) for name, b in st.session_state.banks.items()},
         "active_bank": st.session_state.active_bank,
-        "filters": st.session_state.filters
+        "filters": st.session_state.filters,
+        "study_sets": st.session_state.study_sets,
+        "active_set": st.session_state.active_set
     }
     try:
-        with open(DATA_FILE, "wb") as f:
-            pickle.dump(data, f)
+        os.makedirs(PROGRESS_DIR, exist_ok=True)
+        for name in changed:
+            if name in st.session_state.progress:
+                write_json(progress_file(name), dump_progress(st.session_state.progress[name]))
+        write_json(DATA_FILE, data)
     except:
         pass
 
 
+def cursor_owner():
+    """Banks whose progress holds the current cursor: the active bank, or none for a study set
+    (its cursor is kept in the state file)."""
+    if st.session_state.active_set in st.session_state.study_sets:
+        return ()
+    return (st.session_state.active_bank,)
+
+
+def answer_owner(q):
+    """Bank whose progress records answers to ``q``."""
+    return q.get('bank', st.session_state.active_bank)
+
+
+@st.cache_resource(show_spinner=False)
+def bank_registry():
+    """Banks open in this process, shared by all sessions."""
+    return BankRegistry(BANK_DIR)
+
+
+def open_bank(file_name):
+    """Open a compiled bank once per process.
+
+    File names are content hashes, so every session that loads or imports the same bank
+    shares this read-only instance; sessions only keep a reference plus their own progress.
+    """
+    return bank_registry().acquire(file_name, st.session_state._bank_holder)
+
+
+def release_bank_file(path):
+    """Stop holding a bank file once no bank of this session references it.
+
+    The file itself is not deleted here: other sessions may still use it and write its name
+    back to the state file. Unreferenced files are collected by :func:`collect_unused_banks`.
+    """
+    if all(b.path != path for b in st.session_state.banks.values()):
+        bank_registry().release(os.path.basename(path), st.session_state._bank_holder)
+
+
+def collect_unused_banks(data):
+    """Delete bank files referenced neither by the saved state ``data`` nor by any open session."""
+    keep = set(data.get("bank_files", {}).values()) | bank_registry().held()
+    collect_bank_files(BANK_DIR, keep, BANK_GC_GRACE)
+
+
+def load_banks(data):
+    """Open the compiled bank files referenced by saved state. Returns {name: CompiledBank}."""
+    banks = {}
+    for name, file_name in data.get("bank_files", {}).items():
+        try:
+            banks[name] = open_bank(file_name)
+        except (OSError, BankFormatError):
+            continue
+    return banks
+
+
+def migrate_legacy_state(path):
+    """Convert the pickled v18 state (inline question lists, position-keyed history) to the JSON layout."""
+    try:
+        with open(path, "rb") as f:
+            legacy = pickle.load(f)
+    except:
+        return None
+    data = {"bank_files": {}, "progress": {}, "active_bank": legacy.get("active_bank"),
+            "filters": legacy.get("filters", {})}
+    for name, qs in legacy.get("banks", {}).items():
+        if not qs:
+            continue
+        data["bank_files"][name] = compile_bank(qs, BANK_DIR, compress=COMPRESS_BANKS)
+        old = legacy.get("progress", {}).get(name, {})
+        pg = new_progress()
+        pg["current_idx"] = old.get("current_idx", 0)
+        # 旧 history 以筛选后列表的位置为键，按保存时的筛选映射回题目 id
+        types = data["filters"].get(name)
+        view = [q for q in qs if types is None or q['type'] in types]
+        for idx, choice in old.get("history", {}).items():
+            if idx < len(view) and choice:
+                q = view[idx]
+                pg["answers"].record(q["id"], choice, normalize_answer(choice) == q.get("answer"))
+        for w in old.get("wrong", []):
+            pg["wrong"].setdefault(w["id"], w.get("user_answer"))
+        data["progress"][name] = dump_progress(pg)
+    return data
+
+
 def load_state():
+    data = None
     if os.path.exists(DATA_FILE):
         try:
-            with open(DATA_FILE, "rb") as f:
-                data = pickle.load(f)
-                st.session_state.banks = data.get("banks", {})
-                st.session_state.progress = data.get("progress", {})
-                st.session_state.active_bank = data.get("active_bank", None)
-                st.session_state.filters = data.get("filters", {})
-                return True
+            with open(DATA_FILE, encoding="utf-8") as f:
+                data = json.load(f)
         except:
             pass
-    return False
+    elif os.path.exists(LEGACY_DATA_FILE):
+        data = migrate_legacy_state(LEGACY_DATA_FILE)
+    if data is None:
+        return False
+    st.session_state.banks = load_banks(data)
+    collect_unused_banks(data)
+    inline_progress = data.get("progress", {})  # 旧布局: 所有进度都在状态文件里
+    st.session_state.progress = {}
+    for name in st.session_state.banks:
+        try:
+            with open(progress_file(name), encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = inline_progress.get(name, {})
+        st.session_state.progress[name] = load_progress(saved)
+    st.session_state.active_bank = data.get("active_bank", None)
+    st.session_state.filters = data.get("filters", {})
+    if st.session_state.active_bank not in st.session_state.banks:
+        st.session_state.active_bank = next(iter(st.session_state.banks), None)
+    st.session_state.study_sets = data.get("study_sets", {})
+    st.session_state.active_set = data.get("active_set")
+    if st.session_state.active_set not in st.session_state.study_sets:
+        st.session_state.active_set = None
+    if inline_progress:
+        save_state(*st.session_state.banks)  # 拆分为每个题库一个进度文件
+    return True
+
+
+def wrong_questions(bank, wrong):
+    """Materialize wrong-book entries ({qid: user_answer}) as question dicts."""
+    out = []
+    for qid, user_answer in wrong.items():
+        pos = bank.position_of(qid)
+        if pos is not None:
+            q = bank[pos]
+            q['user_answer'] = user_answer
+            out.append(q)
+    return out
+
+
+def markdown_table(header, rows):
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    lines += ["| " + " | ".join(str(v) for v in row) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def render_dashboard(bank_name, stats):
+    """Stats dashboard for one bank. Renders from running aggregates only, never from answer history."""
+    answered, correct, seconds = stats.totals()
+    st.markdown(f"""
+    <div class="hud-container">
+        <div class="hud-item">📊 {bank_name}</div>
+    </div>
+    """, unsafe_allow_html=True)
+    if not answered:
+        st.info("暂无作答记录")
+        return
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("作答", answered)
+    c2.metric("正确率", f"{stats.accuracy():.1%}")
+    c3.metric("平均用时", f"{stats.avg_seconds():.1f} 秒")
+    c4.metric("连对 / 最佳", f"{stats.streak} / {stats.best_streak}")
+    st.subheader("按题型")
+    st.markdown(markdown_table(TYPE_HEADER, stats.type_rows()))
+    st.subheader("最近学习")
+    st.markdown(markdown_table(SESSION_HEADER, stats.session_rows(limit=20)))
+    st.write("")
+    # 导出文件在点击时才生成 (xlsxwriter 也在那时才导入)，看板重跑不构建工作簿
+    d1, d2 = st.columns(2)
+    d1.download_button("导出 CSV", lambda: export_stats_csv(stats), f"{bank_name}_统计.csv",
+                       mime="text/csv", use_container_width=True)
+    d2.download_button("导出 Excel", lambda: export_stats_xlsx(stats), f"{bank_name}_统计.xlsx",
+                       use_container_width=True)
+
+
+def count_answer_reruns(pending_run=False, answered=1):
+    """Track how many script reruns each answered question cost, per answer mode (shown in the HUD).
+
+    ``pending_run`` is set when called from a widget callback, which runs before the rerun it triggers.
+    The interval in which the user switched modes is not counted for either mode.
+    """
+    mode = st.session_state.answer_mode
+    now = st.session_state._reruns + (1 if pending_run else 0)
+    mark = st.session_state.get('_rerun_mark')
+    if mark is not None and mark[0] == mode:
+        stats = st.session_state.setdefault('_rerun_stats', {})
+        total, n = stats.get(mode, (0, 0))
+        stats[mode] = (total + now - mark[1], n + answered)
+    st.session_state._rerun_mark = (mode, now)
+
+
+def answer_book(q, cursor, pg):
+    """(answers, progress) that an answer to ``q`` belongs to.
+
+    Study-set questions carry their source ``bank``; their answers, wrong-book entries and
+    stats go to that bank's progress under the source question id.
+    """
+    if 'bank' in q:
+        src = st.session_state.progress[q['bank']]
+        return src['answers'], src
+    return cursor['answers'], pg
+
+
+def record_answer(q, user_choice, cursor, pg, pending_run=False):
+    """Grade one answer and fold it into progress, wrong book and stats. Returns True if correct."""
+    is_cor = normalize_answer(user_choice) == q.get('answer', '')  # 题库答案导入时已规范化
+    answers, pg = answer_book(q, cursor, pg)
+    answers.record(q['id'], user_choice, is_cor)
+    pg['stats'].record(q['code'], is_cor, time.time() - st.session_state._shown_at)
+    if not is_cor:
+        add_wrong(pg, q['id'], user_choice)  # 错题本只记录题目 id
+    count_answer_reruns(pending_run)
+    return is_cor
+
+
+def show_feedback():
+    """Show (and clear) the feedback a callback left for this render."""
+    feedback = st.session_state.pop('_feedback', None)
+    if feedback and feedback[0] == "warn":
+        st.toast(feedback[1], icon="⚠️")
+    elif feedback:
+        st.markdown(f"""<div class="feedback-box feedback-{feedback[0]}">{feedback[1]}</div>""",
+                    unsafe_allow_html=True)
+
+
+def answer_widgets(q, key, saved, on_change=None, args=()):
+    """Answer inputs for ``q`` under widget key ``key``; read back with :func:`widget_choice`."""
+    if q['code'] == 'AO':
+        sel = 0 if saved == 'A' else (1 if saved == 'B' else None)
+        st.radio("J", ['A', 'B'], index=sel, format_func=lambda x: "✅ 正确" if x == 'A' else "❌ 错误",
+                 horizontal=True, key=key, label_visibility="collapsed", on_change=on_change, args=args)
+    elif q['code'] == 'BO' and q['options']:
+        ks = list(q['options'].keys())
+        ds = [f"{k}. {v}" for k, v in q['options'].items()]
+        sel = ks.index(saved) if saved in ks else None
+        st.radio("S", ds, index=sel, key=key, label_visibility="collapsed", on_change=on_change, args=args)
+    elif q['code'] == 'CO' and q['options']:
+        st.write("多项选择:")
+        for k, v in q['options'].items():
+            st.checkbox(f"{k}. {v}", value=(k in saved) if saved else False, key=f"{key}_{k}")
+    else:
+        st.text_input("Ans:", value=saved or "", key=key)
+
+
+def widget_choice(q, key):
+    """The answer currently entered in :func:`answer_widgets` for ``q`` ("" if none)."""
+    if q['code'] == 'CO' and q['options']:
+        return "".join(k for k in sorted(q['options']) if st.session_state.get(f"{key}_{k}"))
+    val = st.session_state.get(key) or ""
+    return (val.split('.')[0] if q['code'] == 'BO' and q['options'] else val).strip().upper()
+
+
+def quick_answer(q, cursor, pg, key):
+    """Quick-mode callback: grade and advance before the rerun renders, so one action costs one rerun."""
+    choice = widget_choice(q, key)
+    if not choice:
+        st.session_state._feedback = ("warn", "请先作答")
+        return
+    if record_answer(q, choice, cursor, pg, pending_run=True):
+        st.session_state._feedback = ("success", "✅ 上一题回答正确！")
+    else:
+        st.session_state._feedback = ("error", f"❌ 上一题错误！正确答案是：{q.get('answer', '')}")
+    cursor['current_idx'] += 1
+    save_state(answer_owner(q), *cursor_owner())
+
+
+def move_cursor(cursor, step):
+    cursor['current_idx'] = max(0, cursor['current_idx'] + step)
+    save_state(*cursor_owner())
+
+
+def nav_buttons(idx, cursor, step=1):
+    st.write("")
+    c1, _, c3 = st.columns([1, 2, 1])
+    c1.button("⬅", disabled=(idx == 0), use_container_width=True, on_click=move_cursor, args=(cursor, -step))
+    c3.button("➡", use_container_width=True, on_click=move_cursor, args=(cursor, step))
+
+
+def render_quick_answer(q, idx, wbk, cursor, pg, saved):
+    """Answer widgets for quick mode. Grading happens in callbacks, so no st.rerun() is needed."""
+    show_feedback()
+    key = f"{wbk}_{idx}"
+    args = (q, cursor, pg, key)
+    if q['code'] == 'AO' or (q['code'] == 'BO' and q['options']):
+        answer_widgets(q, key, saved, on_change=quick_answer, args=args)
+    else:
+        with st.form(f"form_{key}", border=False):
+            answer_widgets(q, key, saved)
+            st.form_submit_button("提交", type="primary", use_container_width=True, on_click=quick_answer, args=args)
+    nav_buttons(idx, cursor)
+
+
+def submit_page(bank, page, page_qs, keys, cursor, pg):
+    """Paged-mode callback: grade the whole page in one pass, then record it with a single save."""
+    normalized, results = grade_page(bank, page, [widget_choice(q, key) for q, key in zip(page_qs, keys)])
+    answered = [i for i, r in enumerate(results) if r is not None]
+    if not answered:
+        st.session_state._feedback = ("warn", "本页还没有作答")
+        return
+    now = time.time()
+    seconds = (now - st.session_state._shown_at) / len(answered)
+    wrong = []
+    for i in answered:
+        q, is_cor = page_qs[i], results[i]
+        answers, src = answer_book(q, cursor, pg)
+        answers.record(q['id'], normalized[i], is_cor)
+        src['stats'].record(q['code'], is_cor, seconds, now)
+        if not is_cor:
+            add_wrong(src, q['id'], normalized[i])
+            wrong.append(f"第 {cursor['current_idx'] + i + 1} 题 正确答案：{q['answer']}")
+    count_answer_reruns(pending_run=True, answered=len(answered))
+    summary = f"本页 {len(answered) - len(wrong)}/{len(answered)} 正确"
+    st.session_state._feedback = ("error", "❌ " + "<br>".join([summary] + wrong)) if wrong \
+        else ("success", f"✅ {summary}")
+    cursor['current_idx'] += len(page)
+    save_state(*{answer_owner(q) for q in page_qs}, *cursor_owner())
+
+
+def render_page(bank, qs, idx, wbk, bk, cursor, pg):
+    """Paged mode: the next ``page_size`` questions in one form, graded together on submit."""
+    show_feedback()
+    page = qs[idx:idx + st.session_state.page_size]
+    if st.session_state.get('_shown_q') != (bk, 'page', idx):
+        st.session_state._shown_q = (bk, 'page', idx)
+        st.session_state._shown_at = time.time()
+    page_qs = [bank[pos] for pos in page]
+    keys = [f"{wbk}_{idx + n}" for n in range(len(page))]
+    with st.form(f"page_{wbk}_{idx}", border=False):
+        for n, (q, key) in enumerate(zip(page_qs, keys), idx + 1):
+            st.markdown(f"""
+            <div class="zen-card">
+                <span class="tag">{n}</span> <span class="tag">{q['type']}</span>{f' <span class="tag">{q["bank"]}</span>' if q.get('bank') else ''}{f' <span class="tag">{q["chapter"]}</span>' if q.get('chapter') else ''}
+                <div class="question-text">{q['content']}</div>
+            </div>
+            """, unsafe_allow_html=True)
+            answer_widgets(q, key, answer_book(q, cursor, pg)[0].choice(q['id']))
+        st.form_submit_button("提交本页", type="primary", use_container_width=True,
+                              on_click=submit_page, args=(bank, page, page_qs, keys, cursor, pg))
+    nav_buttons(idx, cursor, len(page))
+
+
+def add_bank(name, qs, lazy=False):
+    """Register a bank with fresh progress and make it active. Returns the final (unique) name.
+
+    Lazy banks store only raw text, type and answer; options are parsed when a question is read.
+    """
+    if name in st.session_state.banks: name += f"_{int(time.time())}"
+    bank = open_bank(compile_bank(qs, BANK_DIR, compress=COMPRESS_BANKS, lazy_options=lazy))
+    st.session_state.banks[name] = bank
+    st.session_state.progress[name] = new_progress()
+    st.session_state.active_bank = name
+    st.session_state.filters[name] = bank.types()
+    return name
+
+
+def remove_bank(name):
+    """Drop a bank and its progress from the session.
+
+    The bank file is only released, not deleted: other sessions may still hold it (see release_bank_file).
+    """
+    bank = st.session_state.banks.pop(name)
+    st.session_state.progress.pop(name, None)
+    st.session_state.filters.pop(name, None)
+    try:
+        os.remove(progress_file(name))
+    except OSError:
+        pass
+    drop_member(st.session_state.study_sets, name)
+    if st.session_state.active_set not in st.session_state.study_sets:
+        st.session_state.active_set = None
+    release_bank_file(bank.path)
+
+
+def update_bank(name, diff):
+    """Replace bank ``name`` with its re-imported version; matched question ids keep their progress."""
+    old = st.session_state.banks[name]
+    new_qs = updated_questions(old, diff, lazy=old.lazy_options)
+    st.session_state.banks[name] = open_bank(
+        compile_bank(new_qs, BANK_DIR, compress=COMPRESS_BANKS, lazy_options=old.lazy_options))
+    apply_to_progress(st.session_state.progress[name], diff)
+    types = st.session_state.banks[name].types()
+    kept = [t for t in st.session_state.filters.get(name, []) if t in types]
+    st.session_state.filters[name] = kept or types
+    release_bank_file(old.path)
 
 
 if 'init' not in st.session_state:
@@ -426,12 +877,23 @@ if 'init' not in st.session_state:
     st.session_state.progress = {}
     st.session_state.active_bank = None
     st.session_state.filters = {}
+    st.session_state.study_sets = {}
+    st.session_state.active_set = None
+    st.session_state._bank_holder = BankHolder()
     load_state()
+    prune_exports(EXPORT_DIR, EXPORT_MAX_AGE)  # 清理已结束会话留下的导出文件
     st.session_state.init = True
 
+st.session_state._reruns = st.session_state.get('_reruns', 0) + 1
+
 # --- 4. 侧边栏 ---
 with st.sidebar:
     st.header("🛠️ 控制台")
+    st.radio("模式", ["📝 刷题", "📊 统计"], horizontal=True, key="view", label_visibility="collapsed")
+    st.radio("作答方式", ["经典", "⚡ 快速", "📄 分页"], horizontal=True, key="answer_mode",
+             help="快速: 单选/判断点选即提交，多选在表单内提交，每次操作只重跑一次；分页: 一页多题一次提交")
+    if st.session_state.answer_mode == "📄 分页":
+        st.number_input("每页题数", min_value=2, max_value=50, value=10, step=1, key="page_size")
 
     st.subheader("📚 题库")
     bank_names = list(st.session_state.banks.keys())
@@ -445,7 +907,7 @@ with st.sidebar:
 
         if st.session_state.active_bank:
             curr_q_list = st.session_state.banks[st.session_state.active_bank]
-            all_types = list(set(q['type'] for q in curr_q_list))
+            all_types = curr_q_list.types()
             default_sel = st.session_state.filters.get(st.session_state.active_bank, all_types)
             st.markdown("---")
             st.subheader("🎯 筛选")
@@ -453,7 +915,7 @@ with st.sidebar:
             if selected_types != default_sel:
                 st.session_state.filters[st.session_state.active_bank] = selected_types
                 st.session_state.progress[st.session_state.active_bank]["current_idx"] = 0
-                save_state()
+                save_state(st.session_state.active_bank)
                 st.rerun()
     else:
         st.warning("暂无题库")
@@ -465,27 +927,160 @@ with st.sidebar:
             st.divider()
             st.subheader(f"📥 错题 ({wrong_cnt})")
             c1, c2 = st.columns(2)
-            xls = export_wrong_questions(prog['wrong'])
-            c1.download_button(f"导出", xls, f"错题.xlsx", use_container_width=True)
+            # 导出文件按需生成，错题本每次变动 (版本号) 后需重新生成
+            wrong_tag = (st.session_state.active_bank, prog.get('wrong_version', 0))
+            if st.session_state.get("_xls_wrong", {}).get("tag") == wrong_tag:
+                export_download(c1, "_xls_wrong", "下载", "错题")
+            elif c1.button("导出", use_container_width=True):
+                prepare_export("_xls_wrong", "xlsx", WRONG_HEADER,
+                               wrong_rows(st.session_state.banks[st.session_state.active_bank], prog['wrong']),
+                               tag=wrong_tag)
+                st.rerun()
             with c2.popover("清空"):
                 if st.button("确认", type="primary"):
-                    prog['wrong'] = []
-                    save_state()
+                    clear_wrong(prog)
+                    save_state(st.session_state.active_bank)
                     st.rerun()
             if st.button("💾 存为新题库", use_container_width=True):
                 new_name = f"{st.session_state.active_bank}_错题本"
-                if new_name in st.session_state.banks: new_name += f"_{int(time.time())}"
                 new_qs = []
-                for wq in prog['wrong']:
-                    nq = wq.copy()
+                for nq in wrong_questions(st.session_state.banks[st.session_state.active_bank], prog['wrong']):
                     nq['user_answer'] = None
                     new_qs.append(nq)
-                st.session_state.banks[new_name] = new_qs
-                st.session_state.progress[new_name] = {"history": {}, "wrong": [], "current_idx": 0}
-                st.session_state.active_bank = new_name
-                st.session_state.filters[new_name] = list(set(q['type'] for q in new_qs))
+                new_name = add_bank(new_name, new_qs,
+                                    lazy=st.session_state.banks[st.session_state.active_bank].lazy_options)
                 st.success(f"已切换至: {new_name}")
-                time.sleep(1)
+                time.sleep(FEEDBACK_DELAY)
+                save_state(new_name)
+                st.rerun()
+
+    if st.session_state.active_bank:
+        bank = st.session_state.banks[st.session_state.active_bank]
+        prog = st.session_state.progress[st.session_state.active_bank]
+        st.divider()
+        with st.expander("📝 组卷考试", expanded=bool(prog.get('exam'))):
+            if prog.get('exam'):
+                st.caption(f"种子 {prog['exam']['seed']} · 共 {len(prog['exam']['ids'])} 题")
+                if st.button("退出考试", use_container_width=True):
+                    prog['exam'] = None
+                    save_state(st.session_state.active_bank)
+                    st.rerun()
+            else:
+                # 按题型分层抽题，题型位置数组由题库索引预先计算
+                pools = bank.type_positions()
+                quotas = {}
+                for code in EXAM_CODES:
+                    if code in pools:
+                        quotas[code] = st.number_input(TYPE_NAME[code], 0, len(pools[code]),
+                                                       min(10, len(pools[code])), key=f"quota_{code}")
+                seed_text = st.text_input("随机种子", placeholder="留空则随机")
+                if st.button("生成试卷", type="primary", use_container_width=True):
+                    seed_text = seed_text.strip()
+                    picked = None
+                    if seed_text and not seed_text.isdecimal():
+                        # 种子用于复现同一份试卷，无法识别的输入不能悄悄换成随机种子
+                        st.warning("随机种子须为非负整数")
+                    else:
+                        seed = int(seed_text) if seed_text else new_seed()
+                        picked = draw_stratified(pools, quotas, seed)
+                        if not picked:
+                            st.warning("请设置题量")
+                    if picked:
+                        prog['exam'] = new_exam([bank.id_at(pos) for pos in picked], seed, quotas)
+                        save_state(st.session_state.active_bank)
+                        st.rerun()
+
+        with st.expander("🔄 更新题库"):
+            # 题目作者修订后重新导入: 先对比差异，确认后再应用，已有进度按题目 id 保留
+            uf = st.file_uploader("新版本 Excel", type=['xlsx', 'xls'], key="update_file")
+            update_sheet = None
+            if uf:
+                # 工作表列表按上传文件缓存；"每表一库" 导入的 {base}_{sheet} 题库默认选中其来源工作表
+                cached = st.session_state.get('_update_sheets')
+                if not cached or cached[0] != uf.file_id:
+                    cached = st.session_state._update_sheets = (uf.file_id, workbook_sheets(uf))
+                sheets = cached[1]
+                if len(sheets) > 1:
+                    choices = sheets + [ALL_SHEETS]
+                    own = bank_sheet(st.session_state.active_bank, sheets)
+                    update_sheet = st.selectbox("工作表", choices, index=choices.index(own) if own else 0,
+                                                key=f"update_sheet_{uf.file_id}_{st.session_state.active_bank}",
+                                                help=f"{ALL_SHEETS}: 所有工作表合并为按章节标记的题库")
+            if uf and st.button("对比", use_container_width=True):
+                with st.spinner("解析中..."):
+                    if update_sheet == ALL_SHEETS:
+                        sheets, err, _ = process_workbook(uf, as_chapters=True, lazy=True)
+                        new_qs = [q for sheet_qs in sheets.values() for q in sheet_qs] if sheets else None
+                    else:
+                        new_qs, err = process_excel(uf, lazy=True, sheet_name=update_sheet or 0)
+                if err:
+                    st.error(err)
+                else:
+                    st.session_state._pending_update = (st.session_state.active_bank, diff_bank(bank, new_qs))
+            pending = st.session_state.get('_pending_update')
+            if pending and pending[0] == st.session_state.active_bank:
+                diff = pending[1]
+                counts = diff.counts()
+                st.markdown(f"不变 **{counts['unchanged']}** · 修改 **{counts['changed']}** · "
+                            f"新增 **{counts['added']}** · 删除 **{counts['removed']}**")
+                for line in diff.preview(bank):
+                    st.caption(line)
+                u1, u2 = st.columns(2)
+                if u1.button("应用更新", type="primary", use_container_width=True):
+                    with st.spinner("更新中..."):
+                        update_bank(st.session_state.active_bank, diff)
+                    del st.session_state._pending_update
+                    save_state(st.session_state.active_bank)
+                    st.rerun()
+                if u2.button("取消", use_container_width=True):
+                    del st.session_state._pending_update
+                    st.rerun()
+
+        with st.expander("📤 导出"):
+            scope = st.radio("范围", ["全部题目", "当前筛选", "错题本", "作答结果"], horizontal=True)
+            fmt = st.selectbox("格式", EXPORT_FORMATS)
+            if st.button("生成文件", use_container_width=True):
+                if scope == "全部题目":
+                    header, rows = BANK_HEADER, bank_rows(bank)
+                elif scope == "当前筛选":
+                    filters = st.session_state.filters.get(st.session_state.active_bank, [])
+                    header, rows = BANK_HEADER, bank_rows(bank, bank.positions(filters))
+                elif scope == "错题本":
+                    header, rows = WRONG_HEADER, wrong_rows(bank, prog['wrong'])
+                else:
+                    header, rows = RESULT_HEADER, result_rows(bank, prog['answers'])
+                try:
+                    with st.spinner("导出中..."):
+                        prepare_export("_export", fmt, header, rows, tag=(st.session_state.active_bank, scope))
+                except RuntimeError as e:
+                    st.error(str(e))
+            exp_tag = st.session_state.get("_export", {}).get("tag")
+            if exp_tag and exp_tag[0] == st.session_state.active_bank:
+                export_download(st, "_export", "⬇️ 下载", f"{exp_tag[0]}_{exp_tag[1]}")
+
+    if bank_names:
+        st.divider()
+        with st.expander("🧩 学习集", expanded=bool(st.session_state.active_set)):
+            # 学习集只保存成员题库名与题型筛选，题目按需从各题库读取
+            set_names = ["（不使用）"] + list(st.session_state.study_sets)
+            curr_set = st.session_state.active_set if st.session_state.active_set in set_names else "（不使用）"
+            picked_set = st.selectbox("练习学习集", set_names, index=set_names.index(curr_set))
+            if picked_set != curr_set:
+                st.session_state.active_set = None if picked_set == "（不使用）" else picked_set
+                save_state()
+                st.rerun()
+            members = st.multiselect("包含题库", bank_names, help="各题库按其当前的题型筛选加入")
+            set_n = st.text_input("学习集名称")
+            if st.button("创建", use_container_width=True, disabled=not members):
+                set_name = set_n.strip() or "+".join(members)
+                st.session_state.study_sets[set_name] = new_study_set(
+                    [(m, st.session_state.filters.get(m)) for m in members])
+                st.session_state.active_set = set_name
+                save_state()
+                st.rerun()
+            if st.session_state.active_set and st.button("删除当前学习集", use_container_width=True):
+                del st.session_state.study_sets[st.session_state.active_set]
+                st.session_state.active_set = None
                 save_state()
                 st.rerun()
 
@@ -493,36 +1088,51 @@ with st.sidebar:
     with st.expander("➕ 导入", expanded=(not bank_names)):
         f = st.file_uploader("Excel", type=['xlsx', 'xls'])
         n = st.text_input("命名")
+        sheet_mode = st.radio("工作表", ["仅首表", "每表一库", "合并为章节"], horizontal=True,
+                              help="多工作表: 每个工作表导入为独立题库，或合并为一个按章节标记的题库")
+        lazy = st.checkbox("延迟解析选项", help="大题库: 导入时只保存原文，选项在首次显示或导出时解析")
         if f and st.button("导入", type="primary"):
+            base_n = n.strip() if n else f.name.split('.')[0]
+            skipped_sheets = []
             with st.spinner("解析中..."):
-                qs, err = process_excel(f)
+                if sheet_mode == "仅首表":
+                    qs, err = process_excel(f, lazy=lazy)
+                    parsed = {base_n: qs}
+                else:
+                    sheets, err, skipped_sheets = process_workbook(f, as_chapters=(sheet_mode == "合并为章节"),
+                                                                         lazy=lazy)
+                    if err:
+                        parsed = None
+                    elif sheet_mode == "合并为章节":
+                        parsed = {base_n: [q for sheet_qs in sheets.values() for q in sheet_qs]}
+                    else:
+                        parsed = {f"{base_n}_{sheet}": sheet_qs for sheet, sheet_qs in sheets.items()}
+            for msg in skipped_sheets:
+                st.warning(f"已跳过 {msg}")
             if err:
                 st.error(err)
             else:
-                final_n = n.strip() if n else f.name.split('.')[0]
-                if final_n in st.session_state.banks: final_n += f"_{int(time.time())}"
-                st.session_state.banks[final_n] = qs
-                st.session_state.progress[final_n] = {"history": {}, "wrong": [], "current_idx": 0}
-                st.session_state.active_bank = final_n
-                st.session_state.filters[final_n] = list(set(q['type'] for q in qs))
-                st.success(f"导入 {len(qs)} 题")
-                time.sleep(1)
-                save_state()
+                added = [add_bank(bank_n, qs, lazy=lazy) for bank_n, qs in parsed.items()]
+                st.success(f"导入 {sum(len(qs) for qs in parsed.values())} 题")
+                time.sleep(FEEDBACK_DELAY)
+                save_state(*added)
                 st.rerun()
 
     if st.session_state.active_bank:
         st.divider()
         with st.popover("🗑️ 删除", use_container_width=True):
             if st.button("🔴 确认"):
-                del st.session_state.banks[st.session_state.active_bank]
-                del st.session_state.progress[st.session_state.active_bank]
-                del st.session_state.filters[st.session_state.active_bank]
+                remove_bank(st.session_state.active_bank)
                 st.session_state.active_bank = list(st.session_state.banks.keys())[
                     0] if st.session_state.banks else None
                 save_state()
                 st.rerun()
 
 # --- 5. 主界面 ---
+if st.session_state.active_bank and st.session_state.view == "📊 统计":
+    render_dashboard(st.session_state.active_bank, st.session_state.progress[st.session_state.active_bank]['stats'])
+    st.stop()
+
 if not st.session_state.active_bank:
     st.markdown(
         """<div class="welcome-container">
@@ -533,33 +1143,57 @@ if not st.session_state.active_bank:
         </div>""",
         unsafe_allow_html=True)
 else:
-    bk = st.session_state.active_bank
-    full_qs = st.session_state.banks[bk]
-    active_filters = st.session_state.filters.get(bk, [])
-    qs = [q for q in full_qs if q['type'] in active_filters]
+    study_set = st.session_state.study_sets.get(st.session_state.active_set)
+    if study_set:
+        # 学习集: 按偏移拼接各成员题库的位置数组，不复制题目；作答记入来源题库
+        bk = st.session_state.active_set
+        full_qs = MergedView(st.session_state.banks, study_set['members'])
+        qs = range(len(full_qs))
+        pg = cursor = study_set
+        exam = None
+        wbk = f"set_{bk}"
+    else:
+        bk = st.session_state.active_bank
+        full_qs = st.session_state.banks[bk]
+        pg = st.session_state.progress[bk]
+        exam = pg.get('exam')
+        if exam:
+            # 考试模式: 试卷只保存题目 id，作答进度与练习分开记录
+            qs = [pos for pos in map(full_qs.position_of, exam['ids']) if pos is not None]
+            cursor = exam
+            wbk = f"{bk}_exam{exam['seed']}"  # 控件 key 前缀，避免与练习模式的控件状态混用
+        else:
+            active_filters = st.session_state.filters.get(bk, [])
+            qs = full_qs.positions(active_filters)  # 筛选后的题目位置，不复制题目
+            cursor = pg
+            wbk = bk
 
     if not qs:
         st.warning("⚠️ 无题目，请检查筛选。")
     else:
-        pg = st.session_state.progress[bk]
-        idx = pg['current_idx']
+        idx = cursor['current_idx']
         total_q = len(qs)
         
         # 当索引超出范围时，表示已完成所有题目
         if idx >= total_q:
             idx = total_q
-            pg['current_idx'] = idx  # 修复：同步更新进度状态
+            cursor['current_idx'] = idx  # 修复：同步更新进度状态
 
         # 计算显示的进度（完成时显示总数，否则显示当前题号）
         done_q = total_q if idx >= total_q else idx + 1
-        wrong_q = len(pg['wrong'])
+        wrong_q = (sum(len(st.session_state.progress[n]['wrong']) for n in full_qs.names) if study_set
+                   else len(pg['wrong']))
+        rerun_total, rerun_n = st.session_state.get('_rerun_stats', {}).get(st.session_state.answer_mode, (0, 0))
+        rerun_hud = (f'<div class="hud-item">重跑/题 <span class="hud-value">{rerun_total / rerun_n:.1f}</span></div>'
+                     if rerun_n else '')
 
         st.markdown(f"""
         <div class="hud-container">
-            <div class="hud-item" style="max-width: 40%; overflow: hidden; text-overflow: ellipsis; white-space: nowrap;">{bk}</div>
+            <div class="hud-item" style="max-width: 40%; overflow: hidden; text-overflow: ellipsis; white-space: nowrap;">{bk}{' · 考试' if exam else ''}{' · 学习集' if study_set else ''}</div>
             <div style="display:flex; gap: 15px;">
                 <div class="hud-item">进度 <span class="hud-value hud-accent">{min(done_q, total_q)}</span>/{total_q}</div>
                 <div class="hud-item">错题 <span class="hud-value hud-warn">{wrong_q}</span></div>
+                {rerun_hud}
             </div>
         </div>
         """, unsafe_allow_html=True)
@@ -571,92 +1205,67 @@ else:
                     <h2 style="font-size: 36px; margin-bottom: 20px;">🎉 恭喜完成!</h2>
                     <p style="font-size: 18px; color: #a0a0b0;">本轮共 <span style="color: var(--accent-color); font-weight: bold;">{total_q}</span> 题</p>
                     <p style="font-size: 18px; color: #a0a0b0;">错题 <span style="color: var(--error-color); font-weight: bold;">{wrong_q}</span> 道</p>
+                    {f'<p style="font-size: 18px; color: #a0a0b0;">得分 <span style="color: var(--accent-color); font-weight: bold;">{exam_score(exam)[0]}</span> / {total_q}</p>' if exam else ''}
                 </div>""",
                 unsafe_allow_html=True)
             st.write("")
             if st.button("🔄 再刷一次", type="primary", use_container_width=True):
-                pg['current_idx'] = 0
-                pg['history'] = {}
-                save_state()
+                cursor['current_idx'] = 0
+                if not study_set:  # 学习集的作答记录属于各来源题库，只重置位置
+                    cursor['answers'] = BankProgress()
+                save_state(*cursor_owner())
                 st.rerun()
+        elif st.session_state.answer_mode == "📄 分页":
+            render_page(full_qs, qs, idx, wbk, bk, cursor, pg)
         else:
-            q = qs[idx]
+            q = full_qs[qs[idx]]
+            # 记录本题开始作答的时间，用于统计用时
+            if st.session_state.get('_shown_q') != (bk, q.get('bank'), q['id']):
+                st.session_state._shown_q = (bk, q.get('bank'), q['id'])
+                st.session_state._shown_at = time.time()
             st.markdown(f"""
             <div class="zen-card">
-                <span class="tag">{q['type']}</span>
+                <span class="tag">{q['type']}</span>{f' <span class="tag">{q["bank"]}</span>' if q.get('bank') else ''}{f' <span class="tag">{q["chapter"]}</span>' if q.get('chapter') else ''}
                 <div class="question-text">{q['content']}</div>
             </div>
             """, unsafe_allow_html=True)
 
-            user_choice = None
-            saved = pg['history'].get(idx)
-
-            if q['code'] == 'AO':
-                sel = 0 if saved == 'A' else (1 if saved == 'B' else None)
-                val = st.radio("J", ['A', 'B'], index=sel, format_func=lambda x: "✅ 正确" if x == 'A' else "❌ 错误",
-                               horizontal=True, key=f"{bk}_{idx}", label_visibility="collapsed")
-                user_choice = val
-            elif q['code'] == 'BO':
-                if q['options']:
-                    ks = list(q['options'].keys())
-                    ds = [f"{k}. {v}" for k, v in q['options'].items()]
-                    sel = ks.index(saved) if saved in ks else None
-                    val = st.radio("S", ds, index=sel, key=f"{bk}_{idx}", label_visibility="collapsed")
-                    if val: user_choice = val.split('.')[0]
-                else:
-                    user_choice = st.text_input("Ans:", value=saved or "", key=f"tx_{bk}_{idx}").strip().upper()
-            elif q['code'] == 'CO':
-                st.write("多项选择:")
-                if q['options']:
-                    sl = []
-                    for k, v in q['options'].items():
-                        chk = (k in saved) if saved else False
-                        if st.checkbox(f"{k}. {v}", value=chk, key=f"{bk}_{idx}_{k}"): sl.append(k)
-                    if sl: user_choice = "".join(sorted(sl))
-                else:
-                    user_choice = st.text_input("Ans:", value=saved or "", key=f"tx_{bk}_{idx}").strip().upper()
+            saved = answer_book(q, cursor, pg)[0].choice(q['id'])
+            if st.session_state.answer_mode == "⚡ 快速":
+                render_quick_answer(q, idx, wbk, cursor, pg, saved)
+                st.stop()
+
+            answer_widgets(q, f"{wbk}_{idx}", saved)
+            user_choice = widget_choice(q, f"{wbk}_{idx}")
 
             feedback_placeholder = st.empty()
             st.write("")
             c1, c2, c3 = st.columns([1, 2, 1])
             if c1.button("⬅", disabled=(idx == 0), use_container_width=True):
-                pg['current_idx'] -= 1
-                save_state()
+                cursor['current_idx'] -= 1
+                save_state(*cursor_owner())
                 st.rerun()
 
             if c2.button("提交", type="primary", use_container_width=True):
                 if not user_choice:
                     st.toast("请先作答", icon="⚠️")
                 else:
-                    pg['history'][idx] = user_choice
-                    ans = q.get('answer', '')
-                    
-                    # Normalize user choice for comparison
-                    normalized_user_choice = normalize_answer(user_choice)
-                    normalized_ans = normalize_answer(ans)
-
-                    is_cor = (normalized_user_choice == normalized_ans)
+                    is_cor = record_answer(q, user_choice, cursor, pg)
                     if is_cor:
                         feedback_placeholder.markdown(
                             f"""<div class="feedback-box feedback-success">✅ 回答正确！</div>""", unsafe_allow_html=True)
-                        time.sleep(0.8)
+                        time.sleep(0.8 * FEEDBACK_DELAY)
                     else:
-                        # Display original answer format if available
-                        display_ans = q.get('answer', ans)
                         feedback_placeholder.markdown(
-                            f"""<div class="feedback-box feedback-error">❌ 错误！正确答案是：{display_ans}</div>""",
+                            f"""<div class="feedback-box feedback-error">❌ 错误！正确答案是：{q.get('answer', '')}</div>""",
                             unsafe_allow_html=True)
-                        if not any(w.get('raw_content') == q.get('raw_content') for w in pg['wrong']):
-                            wrong_q = q.copy()  # 保存问题的副本而不是引用
-                            wrong_q['user_answer'] = user_choice
-                            pg['wrong'].append(wrong_q)
-                        time.sleep(1.5)
-
-                    pg['current_idx'] += 1
-                    save_state()
+                        time.sleep(1.5 * FEEDBACK_DELAY)
+
+                    cursor['current_idx'] += 1
+                    save_state(answer_owner(q), *cursor_owner())
                     st.rerun()
 
             if c3.button("➡", use_container_width=True):
-                pg['current_idx'] += 1
-                save_state()
+                cursor['current_idx'] += 1
+                save_state(*cursor_owner())
                 st.rerun()
\ No newline at end of file
@@ -0,0 +1,421 @@
+"""Compiled, memory-mappable question bank format.
+
+File layout (all integers little-endian)::
+
+    header       fixed size, see HEADER
+    index        count x INDEX_ENTRY, one fixed-width record per question
+    heap         UTF-8 record payloads grouped into blocks (optionally zstd per block)
+    block table  block_count x BLOCK_ENTRY
+
+A record payload is a sequence of length-prefixed UTF-8 strings:
+content, answer, raw_content, chapter, option keys, then one value per option key.
+Each index entry also carries a hash of the question's canonical fields and of its
+optional stable key (e.g. an 编号 column), used to diff a re-imported workbook
+against the bank without decoding records, and the answer as a letter mask
+(see ``quiz_utils.choice_to_mask``; 0 for free-text answers and older files) so a
+page of answers can be graded without decoding records either.
+Banks compiled with ``lazy_options`` leave content and options empty; they are
+parsed from raw_content when a question is read, through a bounded LRU cache.
+Opening a bank only maps the file and parses the header, so reading question N
+touches its index entry and the block holding its payload.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import weakref
+from array import array
+from bisect import bisect_left
+
+from quiz_utils import QUESTION_TYPES, UNKNOWN_TYPE, choice_to_mask, parse_options_lazy
+
+MAGIC = b"ZQB1"
+VERSION = 2
+FLAG_ZSTD = 0x1
+FLAG_SORTED_IDS = 0x2
+FLAG_LAZY_OPTIONS = 0x4
+
+# magic, version, flags, count, block_count, index_offset, heap_offset, blocks_offset, digest
+HEADER = struct.Struct("<4sHHIIQQQ32s")
+# id, code, answer mask, pad, block, offset in (decompressed) block, length, row hash, key hash
+INDEX_ENTRY = struct.Struct("<IBB2xIIIQQ")
+# Version 1 files have no hashes (nor answer masks); they are still readable and hash on demand
+INDEX_ENTRY_V1 = struct.Struct("<IB3xIII")
+INDEX_ENTRIES = {1: INDEX_ENTRY_V1, 2: INDEX_ENTRY}
+# offset from heap start, stored length, raw length
+BLOCK_ENTRY = struct.Struct("<QII")
+FIELD_LEN = struct.Struct("<I")
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+BANK_SUFFIX = ".zqb"
+
+CODES = [code for code, _, _ in QUESTION_TYPES] + [UNKNOWN_TYPE[0]]
+CODE_INDEX = {code: i for i, code in enumerate(CODES)}
+TYPE_NAMES = [name for _, name, _ in QUESTION_TYPES] + [UNKNOWN_TYPE[1]]
+
+
+class BankFormatError(ValueError):
+    """Raised when a file is not a valid compiled bank."""
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd 压缩需要安装 zstandard 包") from None
+    return zstandard
+
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+
+def row_hash(q):
+    """Hash of the fields a re-import compares: type code, raw text, normalized answer, chapter."""
+    return _hash64("\x1f".join([q.get("code") or "", q.get("raw_content") or "",
+                                q.get("answer") or "", q.get("chapter") or ""]))
+
+
+def key_hash(key):
+    """Hash of a stable row key (0 when the row has none)."""
+    return _hash64(str(key)) if key not in (None, "") else 0
+
+
+def _encode_record(q):
+    options = q.get("options") or {}
+    fields = [q.get("content") or "", q.get("answer", ""), q.get("raw_content", ""),
+              q.get("chapter") or "", "".join(options)]
+    fields.extend(options.values())
+    out = bytearray()
+    for field in fields:
+        data = str(field).encode("utf-8")
+        out += FIELD_LEN.pack(len(data))
+        out += data
+    return bytes(out)
+
+
+def _decode_record(buf):
+    fields = []
+    pos, end = 0, len(buf)
+    while pos < end:
+        (n,) = FIELD_LEN.unpack_from(buf, pos)
+        pos += FIELD_LEN.size
+        fields.append(str(buf[pos:pos + n], "utf-8"))
+        pos += n
+    content, answer, raw_content, chapter, keys = fields[:5]
+    return content, answer, raw_content, chapter, dict(zip(keys, fields[5:]))
+
+
+def _raw_only(q):
+    return {"answer": q.get("answer", ""), "raw_content": q.get("raw_content", ""), "chapter": q.get("chapter")}
+
+
+def write_bank(path, questions, compress=False, block_size=DEFAULT_BLOCK_SIZE, lazy_options=False):
+    """Write ``questions`` (a sized sequence of question dicts) to ``path``. Returns the content digest (hex).
+
+    With ``lazy_options`` only raw_content is stored and options are parsed on read.
+    The file is written to a temporary name and atomically moved into place.
+    """
+    zstd = _zstd().ZstdCompressor() if compress else None
+    count = len(questions)
+    index_offset = HEADER.size
+    heap_offset = index_offset + count * INDEX_ENTRY.size
+
+    index = bytearray(count * INDEX_ENTRY.size)
+    blocks = bytearray()
+    digest = hashlib.sha256()
+    sorted_ids = True
+    prev_id = -1
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.seek(heap_offset)
+            heap_pos = 0
+            block = bytearray()
+
+            def flush_block():
+                nonlocal heap_pos
+                stored = zstd.compress(bytes(block)) if zstd else block
+                f.write(stored)
+                blocks.extend(BLOCK_ENTRY.pack(heap_pos, len(stored), len(block)))
+                heap_pos += len(stored)
+                block.clear()
+
+            for pos, q in enumerate(questions):
+                payload = _encode_record(_raw_only(q) if lazy_options else q)
+                if block and len(block) + len(payload) > block_size:
+                    flush_block()
+                qid = int(q["id"])
+                code = CODE_INDEX.get(q.get("code"), CODE_INDEX[UNKNOWN_TYPE[0]])
+                rh, kh = row_hash(q), key_hash(q.get("key"))
+                mask = choice_to_mask(q.get("answer", ""))
+                INDEX_ENTRY.pack_into(index, pos * INDEX_ENTRY.size, qid, code, mask,
+                                      len(blocks) // BLOCK_ENTRY.size, len(block), len(payload), rh, kh)
+                digest.update(INDEX_ENTRY.pack(qid, code, mask, 0, 0, len(payload), rh, kh))
+                digest.update(payload)
+                block += payload
+                sorted_ids = sorted_ids and qid > prev_id
+                prev_id = qid
+            if block:
+                flush_block()
+
+            blocks_offset = heap_offset + heap_pos
+            f.write(blocks)
+            flags = ((FLAG_ZSTD if zstd else 0) | (FLAG_SORTED_IDS if sorted_ids else 0)
+                     | (FLAG_LAZY_OPTIONS if lazy_options else 0))
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, flags, count, len(blocks) // BLOCK_ENTRY.size,
+                                index_offset, heap_offset, blocks_offset, digest.digest()))
+            f.write(index)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest.hexdigest()
+
+
+def compile_bank(questions, directory, compress=False, lazy_options=False):
+    """Write ``questions`` into ``directory`` under a content-addressed file name. Returns the file name."""
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=BANK_SUFFIX)
+    os.close(fd)
+    digest = write_bank(tmp_path, questions, compress=compress, lazy_options=lazy_options)
+    file_name = digest[:32] + BANK_SUFFIX
+    os.replace(tmp_path, os.path.join(directory, file_name))
+    return file_name
+
+
+class CompiledBank:
+    """Read-only, mmap-backed view of a compiled bank.
+
+    Behaves like a sequence of question dicts; records are decoded on access.
+    Instances are immutable after opening and safe to share between sessions/threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER.size:
+            self._mm.close()
+            raise BankFormatError(f"文件过短: {path}")
+        (magic, version, self._flags, self._count, block_count, index_offset,
+         self._heap_offset, blocks_offset, digest) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version not in INDEX_ENTRIES:
+            self._mm.close()
+            raise BankFormatError(f"不是有效的题库文件: {path}")
+        self.digest = digest.hex()
+        self.version = version
+        self._entry = INDEX_ENTRIES[version]
+        view = memoryview(self._mm)
+        self._index = view[index_offset:index_offset + self._count * self._entry.size]
+        self._blocks = view[blocks_offset:blocks_offset + block_count * BLOCK_ENTRY.size]
+        self._block_cache = {}
+        self._block_lock = threading.Lock()
+        self._codes = None
+        self._answer_masks = None
+        self._ids = None
+        self._id_pos = None
+        self._positions = {}
+        self._codes_present = None
+
+    @property
+    def lazy_options(self):
+        return bool(self._flags & FLAG_LAZY_OPTIONS)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for pos in range(self._count):
+            yield self[pos]
+
+    def __getitem__(self, pos):
+        return self.get(pos)
+
+    def get(self, pos, parse=True):
+        """Question at ``pos``. ``parse=False`` skips option parsing on lazy banks (content/options are then empty)."""
+        if pos < 0:
+            pos += self._count
+        if not 0 <= pos < self._count:
+            raise IndexError("question index out of range")
+        entry = self._entry.unpack_from(self._index, pos * self._entry.size)
+        qid, code = entry[:2]
+        block, offset, length = entry[3:6] if self.version >= 2 else entry[2:5]
+        content, answer, raw_content, chapter, options = _decode_record(
+            self._block(block)[offset:offset + length])
+        if parse and self._flags & FLAG_LAZY_OPTIONS:
+            content, options = parse_options_lazy(raw_content)
+        q = {
+            "id": qid, "code": CODES[code], "type": TYPE_NAMES[code],
+            "content": content, "options": options, "answer": answer,
+            "user_answer": None, "raw_content": raw_content
+        }
+        if chapter:
+            q["chapter"] = chapter
+        return q
+
+    def _block(self, n):
+        """Return block ``n`` as a bytes-like object, decompressing (and caching) if needed."""
+        heap_pos, stored_len, raw_len = BLOCK_ENTRY.unpack_from(self._blocks, n * BLOCK_ENTRY.size)
+        start = self._heap_offset + heap_pos
+        if not self._flags & FLAG_ZSTD:
+            return memoryview(self._mm)[start:start + stored_len]
+        cached = self._block_cache.get(n)
+        if cached is None:
+            cached = _zstd().ZstdDecompressor().decompress(self._mm[start:start + stored_len],
+                                                           max_output_size=raw_len)
+            with self._block_lock:
+                if len(self._block_cache) >= 8:
+                    self._block_cache.pop(next(iter(self._block_cache)))
+                self._block_cache[n] = cached
+        return cached
+
+    @property
+    def codes(self):
+        """Type code index (into CODES) of every question, as bytes."""
+        if self._codes is None:
+            self._codes = self._index[4::self._entry.size].tobytes()
+        return self._codes
+
+    @property
+    def answer_masks(self):
+        """Answer letter mask of every question, as bytes (0 where the answer is free text)."""
+        if self._answer_masks is None:
+            self._answer_masks = self._index[5::self._entry.size].tobytes()
+        return self._answer_masks
+
+    @property
+    def ids(self):
+        """Question id of every position, as ``array('I')``."""
+        if self._ids is None:
+            self._ids = array("I", self._index.cast("I")[::self._entry.size // 4])
+        return self._ids
+
+    def id_at(self, pos):
+        return struct.unpack_from("<I", self._index, pos * self._entry.size)[0]
+
+    def hashes_at(self, pos):
+        """(row hash, key hash) of the question at ``pos``; computed from the record for version 1 files."""
+        if self.version >= 2:
+            return struct.unpack_from("<QQ", self._index, pos * self._entry.size + 20)
+        return row_hash(self.get(pos, parse=False)), 0
+
+    def position_of(self, qid):
+        """Position of question ``qid``, or None if absent."""
+        if self._flags & FLAG_SORTED_IDS:
+            ids = self.ids
+            pos = bisect_left(ids, qid)
+            return pos if pos < len(ids) and ids[pos] == qid else None
+        if self._id_pos is None:
+            self._id_pos = {qid: pos for pos, qid in enumerate(self.ids)}
+        return self._id_pos.get(qid)
+
+    def codes_present(self):
+        """Sorted type code indexes that occur in the bank."""
+        if self._codes_present is None:
+            self._codes_present = sorted(set(self.codes))
+        return self._codes_present
+
+    def types(self):
+        """Display names of the question types present in the bank."""
+        return [TYPE_NAMES[c] for c in self.codes_present()]
+
+    def positions(self, type_names):
+        """Positions of questions whose type display name is in ``type_names``."""
+        wanted = frozenset(i for i, name in enumerate(TYPE_NAMES) if name in type_names)
+        if wanted.issuperset(self.codes_present()):
+            return range(self._count)
+        if wanted not in self._positions:
+            self._positions[wanted] = array("I", (pos for pos, c in enumerate(self.codes) if c in wanted))
+        return self._positions[wanted]
+
+    def type_positions(self):
+        """{type code: positions} for every type present in the bank."""
+        return {CODES[c]: self.positions([TYPE_NAMES[c]]) for c in self.codes_present()}
+
+    def close(self):
+        self._index.release()
+        self._blocks.release()
+        self._mm.close()
+
+
+class BankHolder:
+    """Token identifying one session to a :class:`BankRegistry`."""
+
+
+class BankRegistry:
+    """Process-wide open banks, shared by sessions.
+
+    Each session acquires banks with a holder object of its own (kept in its session state)
+    and releases them when it drops a bank. Holders are weakly referenced, so a session that
+    ends without releasing stops holding its banks once it is garbage collected. A bank no
+    holder uses is dropped from the registry and unmapped when its last reference goes.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._banks = {}  # file name -> CompiledBank
+        self._holders = {}  # file name -> WeakSet of holders
+
+    def acquire(self, file_name, holder):
+        """Open ``file_name`` (or reuse the open instance) on behalf of ``holder``."""
+        with self._lock:
+            self._drop_unheld()
+            bank = self._banks.get(file_name)
+            if bank is None:
+                bank = CompiledBank(os.path.join(self.directory, file_name))
+                self._banks[file_name] = bank
+                self._holders[file_name] = weakref.WeakSet()
+            self._holders[file_name].add(holder)
+            return bank
+
+    def release(self, file_name, holder):
+        """Drop ``holder``'s use of ``file_name``."""
+        with self._lock:
+            holders = self._holders.get(file_name)
+            if holders is not None:
+                holders.discard(holder)
+            self._drop_unheld()
+
+    def held(self):
+        """File names some live holder still uses."""
+        with self._lock:
+            return {name for name, holders in self._holders.items() if holders}
+
+    def _drop_unheld(self):
+        for name in [name for name, holders in self._holders.items() if not holders]:
+            del self._holders[name]
+            del self._banks[name]
+
+
+def collect_bank_files(directory, keep, grace, now=None):
+    """Delete bank files in ``directory`` that are not in ``keep`` and older than ``grace`` seconds.
+
+    ``keep`` is every file name still referenced (saved state plus banks open in this process);
+    the grace period protects files another session has just compiled but not yet saved, and
+    temporary files still being written. Returns the number of files removed.
+    """
+    now = time.time() if now is None else now
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.name.endswith(BANK_SUFFIX) or entry.name in keep:
+            continue
+        try:
+            if now - entry.stat().st_mtime > grace:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
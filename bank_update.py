@@ -0,0 +1,136 @@
+"""Incremental re-import: diff a new workbook version against an existing bank.
+
+Existing questions are matched by identical content first, then by stable key
+(编号/ID column) for rows whose content changed, then by position between matched
+neighbours (a row edited in place). Content goes first because authors renumber
+序号/题号 columns when they insert rows; a key match also requires the same type.
+Matched rows keep their question id, so answers and wrong-book entries carry over
+unchanged; only changed and new rows are parsed again.
+"""
+from bank_store import CODE_INDEX, row_hash, key_hash
+from quiz_utils import parse_options_zen
+
+UNCHANGED, CHANGED, ADDED = "unchanged", "changed", "added"
+
+
+class BankDiff:
+    """Result of :func:`diff_bank`."""
+
+    def __init__(self):
+        self.rows = []  # [status, qid, new_question] in new-workbook order
+        self.removed = []  # ids of existing questions with no counterpart
+
+    def counts(self):
+        counts = {UNCHANGED: 0, CHANGED: 0, ADDED: 0}
+        for status, _, _ in self.rows:
+            counts[status] += 1
+        counts["removed"] = len(self.removed)
+        return counts
+
+    def preview(self, bank, limit=5):
+        """A few human-readable lines per kind of change."""
+        lines = []
+        for kind, label in ((CHANGED, "修改"), (ADDED, "新增")):
+            for _, qid, q in [r for r in self.rows if r[0] == kind][:limit]:
+                lines.append(f"{label} #{qid}: {q['raw_content'][:40]}")
+        for qid in self.removed[:limit]:
+            lines.append(f"删除 #{qid}: {bank.get(bank.position_of(qid), parse=False)['raw_content'][:40]}")
+        return lines
+
+
+def diff_bank(bank, new_questions):
+    """Match re-imported rows (ideally built with ``lazy=True``) to the questions of ``bank``."""
+    by_key, by_hash, old_hash, old_key, old_code = {}, {}, {}, {}, {}
+    for pos, qid in enumerate(bank.ids):
+        rh, kh = bank.hashes_at(pos)
+        if kh:
+            by_key[kh] = qid
+        by_hash.setdefault(rh, []).append(qid)
+        old_hash[qid], old_key[qid], old_code[qid] = rh, kh, bank.codes[pos]
+
+    diff = BankDiff()
+    matched = set()
+    hashes = [(row_hash(q), key_hash(q.get("key"))) for q in new_questions]
+    for q, (rh, _) in zip(new_questions, hashes):
+        qid = next((c for c in by_hash.get(rh, ()) if c not in matched), None)
+        if qid is not None:
+            matched.add(qid)
+            diff.rows.append([UNCHANGED, qid, q])
+        else:
+            diff.rows.append([None, None, q])
+    for row, (_, kh) in zip(diff.rows, hashes):
+        qid = by_key.get(kh) if kh and row[0] is None else None
+        if qid is not None and qid not in matched and old_code[qid] == CODE_INDEX.get(row[2].get("code")):
+            matched.add(qid)
+            row[0], row[1] = CHANGED, qid
+
+    # Unmatched rows between two matched neighbours pair up, in order, with the unmatched old
+    # questions between the same neighbours (rows edited in place); the rest are new. A keyed
+    # row only pairs with an old question that had no key (banks imported before keys were
+    # read) or the same key.
+    old_ids = list(bank.ids)
+    old_pos = {qid: pos for pos, qid in enumerate(old_ids)}
+    next_id = max(old_hash, default=-1) + 1
+    prev_pos, gap = -1, []
+
+    def close_gap(end_pos):
+        nonlocal next_id
+        free = [qid for qid in old_ids[prev_pos + 1:max(prev_pos + 1, end_pos)] if qid not in matched]
+        for row in gap:
+            kh = key_hash(row[2].get("key"))
+            qid = next((c for c in free if not kh or old_key[c] in (0, kh)), None)
+            if qid is not None:
+                free.remove(qid)
+                matched.add(qid)
+                row[0], row[1] = CHANGED, qid
+            else:
+                row[0], row[1] = ADDED, next_id
+                next_id += 1
+        gap.clear()
+
+    for row in diff.rows:
+        if row[0] is None:
+            gap.append(row)
+        else:
+            close_gap(old_pos[row[1]])
+            prev_pos = old_pos[row[1]]
+    close_gap(len(old_ids))
+
+    diff.removed = [qid for qid in old_ids if qid not in matched]
+    return diff
+
+
+def updated_questions(bank, diff, lazy=False):
+    """Question list for the new bank version.
+
+    Unchanged questions are copied from the bank as stored; changed and new rows are
+    parsed here unless the bank is lazy.
+    """
+    out = []
+    for status, qid, q in diff.rows:
+        if status == UNCHANGED:
+            nq = bank.get(bank.position_of(qid), parse=False)
+        else:
+            nq = dict(q)
+            if not lazy:
+                nq["content"], nq["options"] = parse_options_zen(nq["raw_content"])
+        nq["id"] = qid
+        if q.get("key"):
+            nq["key"] = q["key"]
+        out.append(nq)
+    return out
+
+
+def apply_to_progress(pg, diff):
+    """Drop answers, wrong-book and exam entries of removed questions; matched ids carry over as is."""
+    removed = set(diff.removed)
+    for qid in removed:
+        pg["answers"].forget(qid)
+        if qid in pg["wrong"]:
+            del pg["wrong"][qid]
+            pg["wrong_version"] = pg.get("wrong_version", 0) + 1
+    exam = pg.get("exam")
+    if exam:
+        exam["ids"] = [qid for qid in exam["ids"] if qid not in removed]
+        for qid in removed:
+            exam["answers"].forget(qid)
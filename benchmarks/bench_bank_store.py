@@ -0,0 +1,65 @@
+"""Benchmark: compile a synthetic bank, then time opening it and reading single questions.
+
+Usage:
+    python benchmarks/bench_bank_store.py [--size 500000] [--zstd]
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank_store import CompiledBank, compile_bank
+from quiz_utils import build_questions
+
+
+def synthetic_bank(size):
+    types = [random.choice(["判断", "单选", "多选"]) for _ in range(size)]
+    contents = [f"第{i}题 以下说法正确的是? A. 选项甲{i} B. 选项乙 C. 选项丙 D. 选项丁" for i in range(size)]
+    answers = [random.choice(["A", "B", "AC"]) for _ in range(size)]
+    return build_questions(types, contents, answers)[0]
+
+
+def rss_mb():
+    """Current resident set size (Linux), falling back to peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=500_000)
+    parser.add_argument("--zstd", action="store_true", help="compress heap blocks with zstd")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        qs = synthetic_bank(args.size)
+        t0 = time.perf_counter()
+        file_name = compile_bank(qs, tmp, compress=args.zstd)
+        print(f"compile: {time.perf_counter() - t0:.2f} s, "
+              f"{os.path.getsize(os.path.join(tmp, file_name)) / 2**20:.1f} MiB")
+        del qs
+
+        rss_before = rss_mb()
+        t0 = time.perf_counter()
+        bank = CompiledBank(os.path.join(tmp, file_name))
+        print(f"open: {(time.perf_counter() - t0) * 1000:.2f} ms")
+
+        picks = [random.randrange(len(bank)) for _ in range(1000)]
+        t0 = time.perf_counter()
+        for pos in picks:
+            bank[pos]
+        print(f"random read: {(time.perf_counter() - t0) * 1e6 / len(picks):.1f} us/question")
+        print(f"RSS growth after open + reads: {rss_mb() - rss_before:.1f} MiB")
+        bank.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark: cost of persisting progress after one answer.
+
+Usage:
+    python benchmarks/bench_save_state.py [--banks 10] [--size 50000]
+
+Compares rewriting every bank's progress into one state file (the old layout)
+with rewriting only the answered bank's progress file (the current layout).
+Each bank has half of its questions answered.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from progress import new_progress, dump_progress
+
+
+def filled_progress(size):
+    pg = new_progress()
+    for qid in range(0, size, 2):
+        pg["answers"].record(qid, "ABCD"[qid % 4], qid % 3 != 0)
+        if qid % 3 == 0:
+            pg["wrong"][qid] = "A"
+        pg["stats"].record("BO", qid % 3 != 0, 10, now=qid)
+    return pg
+
+
+def write(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--banks", type=int, default=10)
+    parser.add_argument("--size", type=int, default=50_000, help="questions per bank")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    progress = {f"bank{i}": filled_progress(args.size) for i in range(args.banks)}
+    with tempfile.TemporaryDirectory() as tmp:
+        all_banks = timed(lambda: write(os.path.join(tmp, "state.json"),
+                                        {name: dump_progress(pg) for name, pg in progress.items()}), args.repeat)
+        one_bank = timed(lambda: write(os.path.join(tmp, "bank0.json"), dump_progress(progress["bank0"])),
+                         args.repeat)
+        size = os.path.getsize(os.path.join(tmp, "bank0.json")) / 1024
+    print(f"{args.banks} banks x {args.size} questions")
+    print(f"all banks per answer: {all_banks:.1f} ms")
+    print(f"one bank per answer:  {one_bank:.1f} ms ({size:.0f} KiB written)")
+
+
+if __name__ == "__main__":
+    main()
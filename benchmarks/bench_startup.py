@@ -0,0 +1,108 @@
+"""Startup benchmark: import-time breakdown and time-to-first-render of app1.py.
+
+Usage:
+    python benchmarks/bench_startup.py [--top 15] [--runs 3] [--bank-size 5000]
+
+Each run seeds a throwaway ZEN_DATA_DIR with an active synthetic bank (as
+load_test.py does), then renders the app once in a fresh interpreter under
+``python -X importtime`` through Streamlit's ``AppTest`` harness. It prints the
+slowest top-level packages and the latency until the first question is
+rendered. Exits non-zero if no question was rendered, or if the tabular stack
+(pandas / xlsxwriter / openpyxl) was imported on the quiz-taking path.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+from load_test import seed_data_dir
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("pandas", "xlsxwriter", "openpyxl")
+
+# Executed in the child interpreter: render the app once and report timings and whether a question was shown
+CHILD_SCRIPT = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file("app1.py", default_timeout=60)
+at.run()
+t2 = time.perf_counter()
+print(json.dumps({
+    "harness_import_s": t1 - t0,
+    "first_render_s": t2 - t1,
+    "exception": [str(e.value) for e in at.exception],
+    "question_rendered": bool(at.radio or at.checkbox or at.text_input),
+    "heavy_loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+# importtime line: "import time: self [us] | cumulative | imported package"
+RE_IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def run_once(bank_size):
+    """Run one cold start on a freshly seeded bank. Returns (result_dict, {top_package: cumulative_us})."""
+    with tempfile.TemporaryDirectory() as data_dir:
+        seed_data_dir(data_dir, bank_size)
+        env = dict(os.environ, ZEN_DATA_DIR=data_dir)
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    packages = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        m = RE_IMPORTTIME.match(line)
+        # Only count top-level entries (indent of one space) so nested imports are not double counted
+        if m and len(m.group(3)) == 1:
+            packages[m.group(4).split('.')[0]] += int(m.group(2))
+    return result, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15, help="number of packages to list")
+    parser.add_argument("--runs", type=int, default=3, help="number of cold starts")
+    parser.add_argument("--bank-size", type=int, default=5000, help="questions in the seeded bank")
+    args = parser.parse_args()
+
+    renders, heavy = [], set()
+    totals = defaultdict(int)
+    for _ in range(args.runs):
+        result, packages = run_once(args.bank_size)
+        if result["exception"]:
+            print("App raised:", result["exception"])
+            return 2
+        if not result["question_rendered"]:
+            print("FAIL: the first render showed no question")
+            return 2
+        renders.append(result["first_render_s"])
+        heavy.update(result["heavy_loaded"])
+        for name, us in packages.items():
+            totals[name] += us
+
+    print(f"{'package':<30}{'cumulative ms':>15}")
+    for name, us in sorted(totals.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{name:<30}{us / args.runs / 1000:>15.1f}")
+    print()
+    print(f"time-to-first-question: min {min(renders) * 1000:.0f} ms, "
+          f"median {sorted(renders)[len(renders) // 2] * 1000:.0f} ms over {args.runs} runs")
+
+    if heavy:
+        print(f"FAIL: heavy modules loaded on the quiz path: {', '.join(sorted(heavy))}")
+        return 1
+    print("OK: no tabular stack imported before first render")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
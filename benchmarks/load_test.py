@@ -0,0 +1,254 @@
+"""Load harness: many concurrent simulated quiz sessions driven through Streamlit's AppTest.
+
+Usage:
+    python benchmarks/load_test.py [--sessions 1,4,16] [--answers 30] [--bank-size 5000] [--restart-every 10] [--quick]
+
+A synthetic bank is compiled into a throwaway data directory through the same
+path the import button uses (AppTest cannot drive ``st.file_uploader``). For
+each N, N sessions run in parallel, each in its own process (AppTest is not
+thread-safe), each looping select answer -> 提交 -> ➡. Every session shares one
+data directory, so ``save_state`` on each submit and ``load_state`` on each
+(re)started session contend exactly as real users do; ``--restart-every`` opens
+a fresh session every K answers to keep exercising ``load_state``. ``--quick``
+answers in the ⚡ 快速 mode instead (picking an option or 提交 in the form is the
+only rerun).
+
+A rerun that raises, or renders a page with neither answer widgets nor a 提交 /
+🔄 再刷一次 button, ends its session as an error; only answers whose reruns all
+rendered a question are counted.
+
+Reports rerun latency percentiles, reruns per answer, cold-session latency,
+throughput, errors and the summed RSS of the session processes.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from queue import Empty
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app1.py")
+sys.path.insert(0, ROOT)
+
+BANK_NAME = "压测题库"
+
+
+def seed_data_dir(data_dir, bank_size):
+    """Compile a synthetic bank and write a state file that makes it the active bank."""
+    from bank_store import compile_bank
+    from progress import new_progress, dump_progress
+    from quiz_utils import build_questions
+
+    types = [("判断", "单选", "多选")[i % 3] for i in range(bank_size)]
+    contents = [f"第{i}题 以下说法正确的是? A. 选项甲 B. 选项乙 C. 选项丙 D. 选项丁" for i in range(bank_size)]
+    answers = [("对", "B", "AC")[i % 3] for i in range(bank_size)]
+    qs, _ = build_questions(types, contents, answers)
+    file_name = compile_bank(qs, os.path.join(data_dir, "banks"))
+    state = {
+        "bank_files": {BANK_NAME: file_name},
+        "progress": {BANK_NAME: dump_progress(new_progress())},
+        "active_bank": BANK_NAME,
+        "filters": {BANK_NAME: ["判断题", "单选题", "多选题"]},
+    }
+    with open(os.path.join(data_dir, "user_data_v19.json"), "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+
+
+def rss_mb():
+    """Current resident set size (Linux), falling back to peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+class SimulatedSession:
+    """One browser tab: an AppTest instance plus its measured reruns."""
+
+    def __init__(self, timeout, quick=False):
+        from streamlit.testing.v1 import AppTest
+
+        self._app_test = AppTest
+        self.timeout = timeout
+        self.quick = quick
+        self.latencies = []
+        self.cold = []
+        self.answers = 0
+        self.at = None
+        self.restart()
+
+    def _timed(self, action):
+        t0 = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - t0
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].value)
+        if not self._has_question():
+            errors = "; ".join(e.value for e in self.at.error)
+            raise RuntimeError(f"rendered no question{': ' + errors if errors else ''}")
+        return elapsed
+
+    def _has_question(self):
+        """Whether the page can be answered: answer widgets, or a 提交 / 🔄 再刷一次 button."""
+        main = self.at.main
+        if main.radio or main.checkbox or main.text_input:
+            return True
+        return self._button("提交") is not None or self._button("🔄 再刷一次") is not None
+
+    def restart(self):
+        """Open a fresh session (runs load_state against the shared DATA_FILE)."""
+        self.at = self._app_test.from_file(APP_PATH, default_timeout=self.timeout)
+        self.cold.append(self._timed(self.at.run))
+        if self.quick:
+            self.cold.append(self._timed(lambda: self.at.sidebar.radio(key="answer_mode").set_value("⚡ 快速").run()))
+
+    def _button(self, label):
+        for b in self.at.main.button:
+            if b.label == label:
+                return b
+        return None
+
+    def answer_once(self):
+        """select answer -> 提交 -> ➡ (one rerun each); restarts the round when the bank is finished."""
+        again = self._button("🔄 再刷一次")
+        if again is not None:
+            self.latencies.append(self._timed(lambda: again.click().run()))
+            return
+        if self.quick:
+            self._answer_quick()
+            return
+        if self.at.main.radio:
+            radio = self.at.main.radio[0]
+            self.latencies.append(self._timed(lambda: radio.set_value(radio.options[0]).run()))
+        elif self.at.main.checkbox:
+            box = self.at.main.checkbox[0]
+            self.latencies.append(self._timed(lambda: box.check().run()))
+        elif self.at.main.text_input:
+            text = self.at.main.text_input[0]
+            self.latencies.append(self._timed(lambda: text.input("A").run()))
+        for label in ("提交", "➡"):
+            button = self._button(label)
+            if button is not None:
+                self.latencies.append(self._timed(lambda: button.click().run()))
+        self.answers += 1
+
+    def _answer_quick(self):
+        """Quick mode: the radio change or the form's 提交 grades and advances in one rerun."""
+        if self.at.main.radio:
+            radio = self.at.main.radio[0]
+            self.latencies.append(self._timed(lambda: radio.set_value(radio.options[0]).run()))
+        else:
+            if self.at.main.checkbox:
+                self.at.main.checkbox[0].check()  # inside the form: no rerun until 提交
+            elif self.at.main.text_input:
+                self.at.main.text_input[0].input("A")
+            button = self._button("提交")
+            self.latencies.append(self._timed(lambda: button.click().run()))
+        self.answers += 1
+
+
+def run_session(n_answers, restart_every, timeout, quick, barrier, results):
+    """Session process: run one session and put its measurements (or its error) on ``results``."""
+    try:
+        from streamlit.testing.v1 import AppTest  # noqa: F401  imported before the barrier so it is not timed
+    except Exception as e:
+        barrier.abort()  # release the sessions already waiting
+        results.put({"error": repr(e)})
+        return
+    try:
+        barrier.wait(timeout)
+        start = time.time()
+        s = SimulatedSession(timeout, quick)
+        for i in range(n_answers):
+            if restart_every and i and i % restart_every == 0:
+                s.restart()
+            s.answer_once()
+    except Exception as e:
+        results.put({"error": repr(e)})
+        return
+    results.put({"latencies": s.latencies, "cold": s.cold, "answers": s.answers,
+                 "start": start, "end": time.time(), "rss_mb": rss_mb(), "error": None})
+
+
+def run_level(n_sessions, n_answers, restart_every, timeout, quick=False):
+    """Run ``n_sessions`` concurrent sessions, one process each, for ``n_answers`` answers each.
+
+    Returns a result dict.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(n_sessions)
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=run_session, args=(n_answers, restart_every, timeout, quick, barrier, queue))
+             for _ in range(n_sessions)]
+    for p in procs:
+        p.start()
+    reports = []
+    while len(reports) < n_sessions:
+        try:
+            reports.append(queue.get(timeout=1))
+        except Empty:
+            if not any(p.is_alive() for p in procs) and queue.empty():
+                break
+    for p in procs:
+        p.join()
+
+    errors = [r["error"] for r in reports if r["error"]]
+    errors += ["session process exited without a report"] * (n_sessions - len(reports))
+    sessions = [r for r in reports if not r["error"]]
+    latencies = [x for s in sessions for x in s["latencies"]]
+    cold = [x for s in sessions for x in s["cold"]]
+    answers = sum(s["answers"] for s in sessions)
+    wall = max(s["end"] for s in sessions) - min(s["start"] for s in sessions) if sessions else 0.0
+    return {
+        "sessions": n_sessions,
+        "reruns": len(latencies),
+        "reruns_per_answer": len(latencies) / answers if answers else 0.0,
+        "p50": percentile(latencies, 50), "p90": percentile(latencies, 90), "p99": percentile(latencies, 99),
+        "cold_p50": percentile(cold, 50),
+        "reruns_per_s": len(latencies) / wall if wall else 0.0,
+        "answers_per_s": answers / wall if wall else 0.0,
+        "rss_mb": sum(s["rss_mb"] for s in sessions),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", default="1,2,4,8,16", help="comma-separated concurrency levels")
+    parser.add_argument("--answers", type=int, default=30, help="answers per session")
+    parser.add_argument("--bank-size", type=int, default=5000)
+    parser.add_argument("--restart-every", type=int, default=10, help="open a fresh session every K answers (0 = never)")
+    parser.add_argument("--quick", action="store_true", help="answer in the single-rerun ⚡ 快速 mode")
+    parser.add_argument("--timeout", type=float, default=60, help="per-rerun timeout in seconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ["ZEN_DATA_DIR"] = data_dir
+        os.environ["ZEN_FEEDBACK_DELAY"] = "0"
+        seed_data_dir(data_dir, args.bank_size)
+
+        print(f"{'N':>4}{'reruns':>8}{'rr/ans':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'cold ms':>9}"
+              f"{'rerun/s':>9}{'ans/s':>8}{'RSS MB':>9}{'errors':>8}")
+        for n in (int(x) for x in args.sessions.split(",")):
+            r = run_level(n, args.answers, args.restart_every, args.timeout, args.quick)
+            print(f"{n:>4}{r['reruns']:>8}{r['reruns_per_answer']:>8.2f}{r['p50'] * 1000:>9.1f}{r['p90'] * 1000:>9.1f}{r['p99'] * 1000:>9.1f}"
+                  f"{r['cold_p50'] * 1000:>9.1f}{r['reruns_per_s']:>9.1f}{r['answers_per_s']:>8.1f}{r['rss_mb']:>9.1f}"
+                  f"{len(r['errors']):>8}")
+            for err in r["errors"][:3]:
+                print(f"      error: {err}")
+
+
+if __name__ == "__main__":
+    main()
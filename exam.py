@@ -0,0 +1,60 @@
+"""Stratified random exam papers with reproducible seeds.
+
+Papers are drawn per question type from precomputed position arrays, so building
+an N-question paper costs O(N) regardless of bank size. A paper is stored as a
+list of question ids, never as copied question dicts.
+"""
+import random
+
+EXAM_CODES = ["AO", "BO", "CO"]
+
+
+def new_seed():
+    return random.SystemRandom().randrange(10 ** 6)
+
+
+def draw_stratified(type_positions, quotas, seed):
+    """Draw ``quotas[code]`` positions from ``type_positions[code]`` for every code.
+
+    ``type_positions`` maps type code to a sequence (list/array/range) of positions.
+    Quotas larger than the available pool are clamped. The result keeps type order
+    (AO, BO, CO...) and the sampled order within each type.
+    """
+    rng = random.Random(seed)
+    picked = []
+    for code in sorted(quotas, key=lambda c: EXAM_CODES.index(c) if c in EXAM_CODES else len(EXAM_CODES)):
+        pool = type_positions.get(code, ())
+        k = min(int(quotas[code]), len(pool))
+        if k > 0:
+            picked.extend(rng.sample(pool, k))
+    return picked
+
+
+def reservoir_stratified(stream, quotas, seed):
+    """Stratified draw from a stream of ``(code, qid)`` pairs using one reservoir per type.
+
+    For banks that are only available as a stream (no index); memory is O(N).
+    Returns the sampled ids in type order.
+    """
+    rng = random.Random(seed)
+    reservoirs = {code: [] for code in quotas}
+    seen = dict.fromkeys(quotas, 0)
+    for code, qid in stream:
+        k = quotas.get(code, 0)
+        if not k:
+            continue
+        seen[code] += 1
+        res = reservoirs[code]
+        if len(res) < k:
+            res.append(qid)
+        else:
+            j = rng.randrange(seen[code])
+            if j < k:
+                res[j] = qid
+    return [qid for code in quotas for qid in reservoirs[code]]
+
+
+def exam_score(exam):
+    """(correct, total) for an exam paper."""
+    answers = exam["answers"]
+    return sum(1 for qid in exam["ids"] if answers.is_correct(qid)), len(exam["ids"])
@@ -0,0 +1,137 @@
+"""Streaming exports of banks, filtered views, the wrong book and answer results.
+
+Rows are produced lazily from the compiled bank and written straight to a file
+(xlsxwriter ``constant_memory`` mode, CSV, or Parquet in row-group batches), so
+memory stays flat however many questions are exported.
+"""
+import csv
+import os
+import tempfile
+import time
+
+EXPORT_FORMATS = ["xlsx", "csv", "parquet"]
+MIME_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+PARQUET_BATCH_ROWS = 10_000
+
+BANK_HEADER = ["编号", "题目类型", "章节", "题目内容", "正确答案"]
+RESULT_HEADER = BANK_HEADER + ["你的答案", "是否正确"]
+WRONG_HEADER = ["题目类型", "题目内容", "正确答案", "你的误选"]
+
+
+def bank_rows(bank, positions=None):
+    """Rows for every question of ``bank`` (or only ``positions``). See BANK_HEADER."""
+    for pos in (range(len(bank)) if positions is None else positions):
+        q = bank.get(pos, parse=False)
+        yield [q['id'], q['type'], q.get('chapter', ''), q['raw_content'], q['answer']]
+
+
+def result_rows(bank, answers, positions=None):
+    """Bank rows plus the recorded answer and its result. See RESULT_HEADER."""
+    for row in bank_rows(bank, positions):
+        qid = row[0]
+        if answers.is_answered(qid):
+            yield row + [answers.choice(qid), "正确" if answers.is_correct(qid) else "错误"]
+        else:
+            yield row + ["", "未作答"]
+
+
+def wrong_rows(bank, wrong):
+    """Wrong-book rows ({qid: user_answer}) in the order they were added. See WRONG_HEADER."""
+    for qid, user_answer in wrong.items():
+        pos = bank.position_of(qid)
+        if pos is None:
+            continue
+        q = bank.get(pos, parse=False)
+        yield [q.get('type', '未知'), q.get('raw_content', ''), q.get('answer', ''), user_answer or '']
+
+
+def write_xlsx(f, header, rows):
+    import xlsxwriter
+
+    # constant_memory flushes each row to disk once the next row starts
+    workbook = xlsxwriter.Workbook(f, {"constant_memory": True})
+    sheet = workbook.add_worksheet()
+    sheet.write_row(0, 0, header)
+    for r, row in enumerate(rows, 1):
+        sheet.write_row(r, 0, row)
+    workbook.close()
+
+
+def write_csv(f, header, rows):
+    with open(f, "w", encoding="utf-8-sig", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_parquet(f, header, rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet 导出需要安装 pyarrow") from None
+
+    writer = None
+    batch = []
+
+    def flush():
+        nonlocal writer
+        columns = list(zip(*batch)) or [()] * len(header)
+        table = pa.table({h: pa.array([str(v) for v in col], pa.string()) for h, col in zip(header, columns)})
+        if writer is None:
+            writer = pq.ParquetWriter(f, table.schema)
+        writer.write_table(table)
+        batch.clear()
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= PARQUET_BATCH_ROWS:
+            flush()
+    if batch or writer is None:
+        flush()
+    writer.close()
+
+
+WRITERS = {"xlsx": write_xlsx, "csv": write_csv, "parquet": write_parquet}
+
+
+def export_to_file(fmt, header, rows, directory=None):
+    """Stream ``rows`` into a new temporary file of format ``fmt``. Returns the file path.
+
+    The caller owns the file and should delete it when it is no longer needed; files that
+    outlive their session are collected by :func:`prune_exports`.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"unsupported export format: {fmt}")
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}", dir=directory)
+    os.close(fd)
+    try:
+        WRITERS[fmt](path, header, rows)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def prune_exports(directory, max_age, now=None):
+    """Delete export files in ``directory`` older than ``max_age`` seconds. Returns the number removed."""
+    now = time.time() if now is None else now
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.name.endswith(tuple(f".{fmt}" for fmt in WRITERS)):
+            continue
+        try:
+            if now - entry.stat().st_mtime > max_age:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
@@ -0,0 +1,27 @@
+"""Page-at-a-time grading against answer keys precomputed at import.
+
+Answers are normalized once when a workbook is imported, and compiled banks keep
+each option answer as a one-byte letter mask in the index (``answer_masks``).
+Grading a page therefore normalizes each submitted choice once and compares two
+mask arrays; only free-text answers fall back to comparing the stored text.
+"""
+from quiz_utils import choice_to_mask, normalize_answer
+
+
+def grade_page(bank, positions, choices):
+    """Grade ``choices`` (raw user answers parallel to ``positions``; empty/None = unanswered).
+
+    Returns ``(normalized_choices, results)``; ``results[i]`` is True/False, or None
+    for an unanswered question.
+    """
+    keys = bank.answer_masks
+    normalized = [normalize_answer(c) if c else "" for c in choices]
+    results = []
+    for pos, choice, mask in zip(positions, normalized, map(choice_to_mask, normalized)):
+        if not choice:
+            results.append(None)
+        elif keys[pos]:
+            results.append(mask == keys[pos])
+        else:
+            results.append(choice == bank.get(pos, parse=False)["answer"])
+    return normalized, results
@@ -0,0 +1,171 @@
+"""Compact per-bank answer progress keyed by stable question ids.
+
+Answered/correct flags are bitsets and the chosen answer is a packed byte per
+question (bit k set = option chr(ord('A') + k)), so recording an answer is O(1)
+and the persisted form is a few zlib-compressed byte strings regardless of how
+many questions were answered or which type filter is active.
+"""
+import base64
+import zlib
+
+from quiz_utils import choice_to_mask, mask_to_choice
+from stats import QuizStats
+
+
+def _pack(data):
+    return base64.b64encode(zlib.compress(bytes(data), 9)).decode("ascii")
+
+
+def _unpack(text):
+    return bytearray(zlib.decompress(base64.b64decode(text)))
+
+
+def _popcount(bits):
+    return bin(int.from_bytes(bits, "little")).count("1")
+
+
+class BankProgress:
+    """Answered/correct bitsets plus packed chosen answers for one bank."""
+
+    def __init__(self):
+        self.answered = bytearray()
+        self.correct = bytearray()
+        self.choices = bytearray()
+        self.extra = {}  # qid -> choice for answers that do not fit a mask (free text, options past H)
+
+    def _ensure(self, qid):
+        if qid >= len(self.choices):
+            size = max(qid + 1, len(self.choices) * 2)
+            self.choices.extend(bytes(size - len(self.choices)))
+            nbytes = (size + 7) // 8
+            self.answered.extend(bytes(nbytes - len(self.answered)))
+            self.correct.extend(bytes(nbytes - len(self.correct)))
+
+    def record(self, qid, choice, is_correct):
+        """Record the answer to question ``qid``."""
+        self._ensure(qid)
+        byte, bit = qid >> 3, 1 << (qid & 7)
+        self.answered[byte] |= bit
+        if is_correct:
+            self.correct[byte] |= bit
+        else:
+            self.correct[byte] &= ~bit & 0xFF
+        mask = choice_to_mask(choice)
+        self.choices[qid] = mask
+        if mask:
+            self.extra.pop(qid, None)
+        else:
+            self.extra[qid] = choice
+
+    def is_answered(self, qid):
+        return qid < len(self.choices) and bool(self.answered[qid >> 3] & (1 << (qid & 7)))
+
+    def is_correct(self, qid):
+        return qid < len(self.choices) and bool(self.correct[qid >> 3] & (1 << (qid & 7)))
+
+    def choice(self, qid):
+        """The recorded answer for ``qid``, or None if unanswered."""
+        if not self.is_answered(qid):
+            return None
+        if qid in self.extra:
+            return self.extra[qid]
+        return mask_to_choice(self.choices[qid])
+
+    def answered_count(self):
+        return _popcount(self.answered)
+
+    def correct_count(self):
+        return _popcount(self.correct)
+
+    def forget(self, qid):
+        """Clear the answer recorded for ``qid``."""
+        if qid < len(self.choices):
+            bit = ~(1 << (qid & 7)) & 0xFF
+            self.answered[qid >> 3] &= bit
+            self.correct[qid >> 3] &= bit
+            self.choices[qid] = 0
+        self.extra.pop(qid, None)
+
+    def to_dict(self):
+        """JSON-serializable form."""
+        return {
+            "size": len(self.choices),
+            "answered": _pack(self.answered),
+            "correct": _pack(self.correct),
+            "choices": _pack(self.choices),
+            "extra": {str(qid): choice for qid, choice in self.extra.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        p = cls()
+        if data.get("size"):
+            p.answered = _unpack(data["answered"])
+            p.correct = _unpack(data["correct"])
+            p.choices = _unpack(data["choices"])
+        p.extra = {int(qid): choice for qid, choice in data.get("extra", {}).items()}
+        return p
+
+
+def new_progress():
+    """Fresh per-bank progress record.
+
+    ``wrong_version`` changes whenever the wrong book does (see add_wrong); it only tags
+    cached exports within a session and is not persisted.
+    """
+    return {"answers": BankProgress(), "wrong": {}, "current_idx": 0, "stats": QuizStats(), "exam": None,
+            "wrong_version": 0}
+
+
+def add_wrong(pg, qid, choice):
+    """Add ``qid`` to the wrong book; an id already there keeps its first wrong answer."""
+    if qid not in pg["wrong"]:
+        pg["wrong"][qid] = choice
+        pg["wrong_version"] = pg.get("wrong_version", 0) + 1
+
+
+def clear_wrong(pg):
+    pg["wrong"] = {}
+    pg["wrong_version"] = pg.get("wrong_version", 0) + 1
+
+
+def new_exam(ids, seed, quotas):
+    """Exam paper stored in a bank's progress: question ids only, answers tracked apart from practice."""
+    return {"ids": list(ids), "seed": seed, "quotas": dict(quotas),
+            "current_idx": 0, "answers": BankProgress()}
+
+
+def dump_progress(pg):
+    """Per-bank progress -> JSON-serializable dict. The wrong book is kept in insertion order."""
+    return {
+        "answers": pg["answers"].to_dict(),
+        "wrong": [[qid, choice] for qid, choice in pg["wrong"].items()],
+        "current_idx": pg["current_idx"],
+        "stats": pg["stats"].to_dict(),
+        "exam": _dump_exam(pg["exam"]) if pg.get("exam") else None,
+    }
+
+
+def load_progress(data):
+    """Inverse of :func:`dump_progress`."""
+    return {
+        "answers": BankProgress.from_dict(data.get("answers", {})),
+        "wrong": {int(qid): choice for qid, choice in data.get("wrong", [])},
+        "current_idx": int(data.get("current_idx", 0)),
+        "stats": QuizStats.from_dict(data.get("stats", {})),
+        "exam": _load_exam(data["exam"]) if data.get("exam") else None,
+        "wrong_version": 0,
+    }
+
+
+def _dump_exam(exam):
+    data = {k: exam[k] for k in ("ids", "seed", "quotas", "current_idx")}
+    data["answers"] = exam["answers"].to_dict()
+    return data
+
+
+def _load_exam(data):
+    exam = new_exam(data.get("ids", []), data.get("seed"), data.get("quotas", {}))
+    exam["current_idx"] = int(data.get("current_idx", 0))
+    exam["answers"] = BankProgress.from_dict(data.get("answers", {}))
+    return exam
@@ -1,5 +1,6 @@
 """Core parsing and normalization utilities for the quiz application."""
 import re
+from functools import lru_cache
 
 # --- Regex Patterns for Option Parsing ---
 # Pattern 1: A. / A、 / A: / A．with whitespace prefix
@@ -48,6 +49,26 @@ def normalize_answer(answer):
     return ''.join(sorted(set(answer)))
 
 
+MASK_LETTERS = "ABCDEFGH"
+
+
+def choice_to_mask(choice):
+    """Encode a normalized choice (sorted unique letters A-H) as a byte; 0 if it cannot be packed."""
+    if not choice or choice != "".join(sorted(set(choice))):
+        return 0
+    mask = 0
+    for ch in choice:
+        k = MASK_LETTERS.find(ch)
+        if k < 0:
+            return 0
+        mask |= 1 << k
+    return mask
+
+
+def mask_to_choice(mask):
+    return "".join(ch for k, ch in enumerate(MASK_LETTERS) if mask >> k & 1)
+
+
 def parse_options_zen(text):
     """Parse question text to extract options. Returns (question_text, options_dict)."""
     text = normalize_text(text)
@@ -99,3 +120,122 @@ def parse_options_zen(text):
                     return text[:first_match_start].strip(), temp_options
     
     return question_text, options
+
+
+OPTIONS_CACHE_SIZE = 4096  # parsed questions kept by parse_options_lazy
+
+
+@lru_cache(maxsize=OPTIONS_CACHE_SIZE)
+def _parse_options_cached(text):
+    q_text, options = parse_options_zen(text)
+    return q_text, tuple(options.items())
+
+
+def parse_options_lazy(text):
+    """parse_options_zen behind a bounded LRU cache. Returns a fresh options dict on every call."""
+    q_text, items = _parse_options_cached(text)
+    return q_text, dict(items)
+
+
+# --- Column detection and row parsing (shared by every sheet of a workbook) ---
+TYPE_KEYWORDS = ['类型', 'Type', '题型', 'type', 'kind']
+CONTENT_KEYWORDS = ['内容', 'Content', '题目', '问题', 'question', 'content']
+ANSWER_KEYWORDS = ['答案', 'Answer', '结果', '正确答案', 'answer', 'result']
+# Optional stable row key, used to match rows when a workbook is re-imported
+KEY_KEYWORDS = ['编号', '题号', '序号', 'ID']
+
+# (code, display name, keywords) checked in order
+QUESTION_TYPES = [
+    ('AO', '判断题', ['AO', '判断', 'TRUE', 'FALSE', 'TF', '对错', '是非']),
+    ('BO', '单选题', ['BO', '单选', 'SINGLE', '单项', 'RADIO']),
+    ('CO', '多选题', ['CO', '多选', 'MULTI', '多项', 'CHECKBOX']),
+]
+UNKNOWN_TYPE = ('UNK', '未知')
+
+
+def find_column(columns, keywords):
+    """Find the first column whose name contains any keyword (case-insensitive)."""
+    for c in columns:
+        c_lower = str(c).lower()
+        for kw in keywords:
+            if kw.lower() in c_lower:
+                return c
+    return None
+
+
+def detect_columns(columns):
+    """Detect the type/content/answer columns. Returns ((col_type, col_content, col_answer), missing_labels)."""
+    col_type = find_column(columns, TYPE_KEYWORDS)
+    col_content = find_column(columns, CONTENT_KEYWORDS)
+    col_answer = find_column(columns, ANSWER_KEYWORDS)
+
+    missing = []
+    if not col_type:
+        missing.append("类型/Type/题型")
+    if not col_content:
+        missing.append("内容/Content/题目")
+    if not col_answer:
+        missing.append("答案/Answer/结果")
+    return (col_type, col_content, col_answer), missing
+
+
+def detect_key_column(columns, exclude=()):
+    """Find the optional stable-key column (编号/ID...), ignoring columns already used for questions."""
+    return find_column([c for c in columns if c not in exclude], KEY_KEYWORDS)
+
+
+def classify_type(raw_type):
+    """Map a raw type cell to (code, display name)."""
+    raw_type = normalize_text(raw_type).upper()
+    for code, name, keywords in QUESTION_TYPES:
+        if any(x in raw_type for x in keywords):
+            return code, name
+    return UNKNOWN_TYPE
+
+
+def build_questions(types, contents, answers, id_offset=0, chapter=None, on_progress=None, lazy=False,
+                    keys=None):
+    """Build question dicts from parallel column sequences.
+
+    Row ``i`` gets id ``id_offset + i`` so ids stay stable across re-imports of the
+    same sheet. ``chapter`` tags every question (used for multi-sheet banks).
+    ``on_progress(done, total)`` is called roughly every 10% of rows.
+    With ``lazy`` the options are not parsed: ``content`` and ``options`` are None and
+    are filled in later from ``raw_content`` (see parse_options_lazy).
+    ``keys`` (optional, parallel to the other columns) is stored as each question's ``key``.
+    Returns (questions, skipped_count).
+    """
+    questions = []
+    skipped_count = 0
+    total_rows = len(contents)
+    step = max(1, total_rows // 10)
+
+    for i, (raw_type, raw_content, raw_answer) in enumerate(zip(types, contents, answers)):
+        try:
+            if on_progress and i % step == 0:
+                on_progress(i + 1, total_rows)
+
+            # Skip empty rows
+            if not raw_content or not raw_content.strip():
+                skipped_count += 1
+                continue
+
+            q_code, q_name = classify_type(raw_type)
+            q_text, q_options = (None, None) if lazy else parse_options_zen(raw_content)
+
+            q = {
+                "id": id_offset + i, "code": q_code, "type": q_name,
+                "content": q_text, "options": q_options, "answer": normalize_answer(raw_answer),
+                "user_answer": None, "raw_content": raw_content
+            }
+            if chapter is not None:
+                q["chapter"] = chapter
+            if keys is not None and str(keys[i]).strip():
+                q["key"] = str(keys[i]).strip()
+            questions.append(q)
+        except Exception:
+            # Skip problematic rows but continue processing
+            skipped_count += 1
+            continue
+
+    return questions, skipped_count
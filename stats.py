@@ -0,0 +1,126 @@
+"""Incremental answer statistics: per-type accuracy, pace, streaks and study sessions.
+
+Every submit updates a handful of running counters in O(1), so the dashboard and
+exports never rescan answer history or the wrong book.
+"""
+import csv
+import io
+import time
+
+from quiz_utils import QUESTION_TYPES, UNKNOWN_TYPE
+
+SESSION_GAP = 30 * 60  # seconds of inactivity that start a new study session
+MAX_ANSWER_SECONDS = 10 * 60  # cap per-question time so idle tabs do not skew the pace
+
+TYPE_NAME = {code: name for code, name, _ in QUESTION_TYPES}
+TYPE_NAME[UNKNOWN_TYPE[0]] = UNKNOWN_TYPE[1]
+
+TYPE_HEADER = ["题型", "作答", "正确", "正确率(%)", "平均用时(秒)"]
+SESSION_HEADER = ["开始", "结束", "作答", "正确", "正确率(%)", "平均用时(秒)"]
+
+
+def _ratio(part, whole):
+    return part / whole if whole else 0.0
+
+
+def _fmt_time(ts):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+
+
+class QuizStats:
+    """Running aggregates for one bank."""
+
+    def __init__(self):
+        self.by_type = {}  # code -> [answered, correct, seconds]
+        self.streak = 0
+        self.best_streak = 0
+        self.sessions = []  # [start_ts, end_ts, answered, correct, seconds]
+
+    def record(self, code, is_correct, seconds, now=None):
+        """Fold one submitted answer into the aggregates."""
+        now = time.time() if now is None else now
+        seconds = max(0.0, min(float(seconds), MAX_ANSWER_SECONDS))
+        hit = 1 if is_correct else 0
+
+        agg = self.by_type.setdefault(code, [0, 0, 0.0])
+        agg[0] += 1
+        agg[1] += hit
+        agg[2] += seconds
+
+        self.streak = self.streak + 1 if is_correct else 0
+        self.best_streak = max(self.best_streak, self.streak)
+
+        if not self.sessions or now - self.sessions[-1][1] > SESSION_GAP:
+            self.sessions.append([now, now, 0, 0, 0.0])
+        sess = self.sessions[-1]
+        sess[1] = now
+        sess[2] += 1
+        sess[3] += hit
+        sess[4] += seconds
+
+    def totals(self):
+        """(answered, correct, seconds) over all types."""
+        answered = sum(a[0] for a in self.by_type.values())
+        correct = sum(a[1] for a in self.by_type.values())
+        seconds = sum(a[2] for a in self.by_type.values())
+        return answered, correct, seconds
+
+    def accuracy(self, code=None):
+        answered, correct, _ = self.totals() if code is None else self.by_type.get(code, (0, 0, 0.0))
+        return _ratio(correct, answered)
+
+    def avg_seconds(self, code=None):
+        answered, _, seconds = self.totals() if code is None else self.by_type.get(code, (0, 0, 0.0))
+        return _ratio(seconds, answered)
+
+    def type_rows(self):
+        """Per-type table rows (see TYPE_HEADER)."""
+        return [[TYPE_NAME.get(code, code), n, c, round(100 * _ratio(c, n), 1), round(_ratio(s, n), 1)]
+                for code, (n, c, s) in sorted(self.by_type.items())]
+
+    def session_rows(self, limit=None):
+        """Most recent sessions first (see SESSION_HEADER)."""
+        sessions = self.sessions[::-1] if limit is None else self.sessions[:-limit - 1:-1]
+        return [[_fmt_time(start), _fmt_time(end), n, c, round(100 * _ratio(c, n), 1), round(_ratio(s, n), 1)]
+                for start, end, n, c, s in sessions]
+
+    def to_dict(self):
+        return {"by_type": self.by_type, "streak": self.streak,
+                "best_streak": self.best_streak, "sessions": self.sessions}
+
+    @classmethod
+    def from_dict(cls, data):
+        s = cls()
+        s.by_type = {code: list(agg) for code, agg in data.get("by_type", {}).items()}
+        s.streak = data.get("streak", 0)
+        s.best_streak = data.get("best_streak", 0)
+        s.sessions = [list(sess) for sess in data.get("sessions", [])]
+        return s
+
+
+def export_stats_csv(stats):
+    """Per-type and per-session tables as UTF-8 CSV bytes (BOM so Excel detects the encoding)."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(TYPE_HEADER)
+    writer.writerows(stats.type_rows())
+    writer.writerow([])
+    writer.writerow(SESSION_HEADER)
+    writer.writerows(stats.session_rows())
+    return out.getvalue().encode("utf-8-sig")
+
+
+def export_stats_xlsx(stats):
+    """Per-type and per-session tables as an xlsx workbook (bytes)."""
+    import xlsxwriter
+
+    out = io.BytesIO()
+    workbook = xlsxwriter.Workbook(out, {"in_memory": True})
+    for title, header, rows in (("按题型", TYPE_HEADER, stats.type_rows()),
+                                ("学习记录", SESSION_HEADER, stats.session_rows())):
+        sheet = workbook.add_worksheet(title)
+        sheet.write_row(0, 0, header)
+        for r, row in enumerate(rows, 1):
+            sheet.write_row(r, 0, row)
+    workbook.close()
+    return out.getvalue()
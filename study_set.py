@@ -0,0 +1,90 @@
+"""Virtual study sets: practice several banks (each with a type filter) as one sequence.
+
+A study set stores only member bank names, their type filters and a cursor, so
+creating or saving one costs O(members) whatever the size of the banks. Questions
+are reached through :class:`MergedView`, which concatenates each bank's cached
+position arrays by offset instead of copying question dicts; answers keep their
+source bank and question id, so progress stays with the bank they came from.
+"""
+from bisect import bisect_right
+
+
+def new_study_set(members):
+    """A study set over ``members``: (bank name, type names or None for all types) pairs."""
+    return {"members": [[name, list(types) if types is not None else None] for name, types in members],
+            "current_idx": 0}
+
+
+def drop_member(study_sets, bank_name):
+    """Remove ``bank_name`` from every study set; sets left without members are deleted."""
+    for name in list(study_sets):
+        members = [m for m in study_sets[name]["members"] if m[0] != bank_name]
+        if members:
+            study_sets[name]["members"] = members
+        else:
+            del study_sets[name]
+
+
+class _MaskColumn:
+    """``answer_masks`` of a merged view, read through to the member banks."""
+
+    def __init__(self, view):
+        self._view = view
+
+    def __getitem__(self, i):
+        _, bank, pos = self._view.locate(i)
+        return bank.answer_masks[pos]
+
+
+class MergedView:
+    """Read-only sequence of the questions of several banks, in member order.
+
+    Position ``i`` maps to (member, position in its bank) by bisecting the cumulative
+    member lengths. Questions are returned as the bank returns them, plus a ``bank``
+    key naming their source. Members whose bank no longer exists are skipped.
+    """
+
+    def __init__(self, banks, members):
+        self.parts = []  # (bank name, bank, positions)
+        self._offsets = [0]
+        for name, types in members:
+            bank = banks.get(name)
+            if bank is None:
+                continue
+            positions = bank.positions(bank.types() if types is None else types)
+            self.parts.append((name, bank, positions))
+            self._offsets.append(self._offsets[-1] + len(positions))
+
+    @property
+    def names(self):
+        return [name for name, _, _ in self.parts]
+
+    def __len__(self):
+        return self._offsets[-1]
+
+    def locate(self, i):
+        """(bank name, bank, position in bank) of merged position ``i``."""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("study set index out of range")
+        part = bisect_right(self._offsets, i) - 1
+        name, bank, positions = self.parts[part]
+        return name, bank, positions[i - self._offsets[part]]
+
+    def get(self, i, parse=True):
+        name, bank, pos = self.locate(i)
+        q = bank.get(pos, parse=parse)
+        q["bank"] = name
+        return q
+
+    def __getitem__(self, i):
+        return self.get(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def answer_masks(self):
+        return _MaskColumn(self)
@@ -0,0 +1,146 @@
+"""Unit tests for the compiled bank format in bank_store.py"""
+import sys
+import os
+import gc
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank_store import (CompiledBank, BankFormatError, BankHolder, BankRegistry, collect_bank_files,
+                        compile_bank, write_bank)
+from quiz_utils import build_questions
+
+
+def _questions(n=30):
+    types = ["判断", "单选", "多选"] * (n // 3)
+    contents = [f"第{i}题 A. 甲{i} B. 乙 C. 丙" for i in range(len(types))]
+    answers = ["对", "b", "AC"] * (n // 3)
+    return build_questions(types, contents, answers, chapter="第一章")[0]
+
+
+class TestCompiledBank:
+    """Round trip and random access on compiled banks."""
+
+    def test_round_trip(self, tmp_path):
+        qs = _questions()
+        bank = CompiledBank(os.path.join(tmp_path, compile_bank(qs, tmp_path)))
+        assert len(bank) == len(qs)
+        assert list(bank) == qs
+        assert bank[-1] == qs[-1]
+        bank.close()
+
+    def test_small_blocks(self, tmp_path):
+        qs = _questions(300)
+        path = os.path.join(tmp_path, "b.zqb")
+        write_bank(path, qs, block_size=256)
+        bank = CompiledBank(path)
+        assert bank[157] == qs[157]
+        bank.close()
+
+    def test_index_columns(self, tmp_path):
+        qs = _questions()
+        bank = CompiledBank(os.path.join(tmp_path, compile_bank(qs, tmp_path)))
+        assert list(bank.ids) == [q["id"] for q in qs]
+        assert bank.types() == ["判断题", "单选题", "多选题"]
+        assert list(bank.positions(["单选题"])) == list(range(1, 30, 3))
+        assert len(bank.positions(bank.types())) == len(qs)
+        assert bank.position_of(7) == 7
+        assert bank.position_of(999) is None
+        assert list(bank.type_positions()["CO"]) == list(range(2, 30, 3))
+        bank.close()
+
+    def test_answer_masks(self, tmp_path):
+        qs = _questions()
+        qs[0]["answer"] = "自由作答"
+        bank = CompiledBank(os.path.join(tmp_path, compile_bank(qs, tmp_path)))
+        assert bank.answer_masks[:4] == bytes([0, 0b10, 0b101, 0b1])
+        assert bank[0]["answer"] == "自由作答"
+        bank.close()
+
+    def test_unsorted_ids(self, tmp_path):
+        qs = list(reversed(_questions()))
+        bank = CompiledBank(os.path.join(tmp_path, compile_bank(qs, tmp_path)))
+        assert bank.position_of(0) == len(qs) - 1
+        bank.close()
+
+    def test_content_addressed(self, tmp_path):
+        qs = _questions()
+        assert compile_bank(qs, tmp_path) == compile_bank(qs, tmp_path)
+        assert compile_bank(qs[:-1], tmp_path) != compile_bank(qs, tmp_path)
+
+    def test_zstd_blocks(self, tmp_path):
+        pytest.importorskip("zstandard")
+        qs = _questions(300)
+        bank = CompiledBank(os.path.join(tmp_path, compile_bank(qs, tmp_path, compress=True)))
+        assert bank[299] == qs[299]
+        bank.close()
+
+    def test_shared_between_threads(self, tmp_path):
+        from concurrent.futures import ThreadPoolExecutor
+
+        qs = _questions(300)
+        bank = CompiledBank(os.path.join(tmp_path, compile_bank(qs, tmp_path)))
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda pos: bank[pos] == qs[pos] and bank.position_of(qs[pos]["id"]) == pos,
+                                    range(300)))
+        assert all(results)
+        bank.close()
+
+    def test_rejects_foreign_file(self, tmp_path):
+        path = os.path.join(tmp_path, "x.zqb")
+        with open(path, "wb") as f:
+            f.write(b"\x80\x04" + b"\0" * 200)
+        with pytest.raises(BankFormatError):
+            CompiledBank(path)
+
+
+class TestLazyOptions:
+    """Banks compiled with lazy_options parse options on read."""
+
+    def test_lazy_bank_matches_eager(self, tmp_path):
+        qs = _questions()
+        types = [q["type"][:2] for q in qs]
+        lazy_qs = build_questions(types, [q["raw_content"] for q in qs], [q["answer"] for q in qs],
+                                  chapter="第一章", lazy=True)[0]
+        assert lazy_qs[0]["options"] is None
+        bank = CompiledBank(os.path.join(tmp_path, compile_bank(lazy_qs, tmp_path, lazy_options=True)))
+        assert bank.lazy_options
+        assert list(bank) == qs
+        assert bank.get(3, parse=False)["options"] == {}
+        bank.close()
+
+
+class TestBankRegistry:
+    """Process-wide sharing of open banks and collection of unused files."""
+
+    def test_shared_and_released(self, tmp_path):
+        name = compile_bank(_questions(), tmp_path)
+        registry = BankRegistry(str(tmp_path))
+        a, b = BankHolder(), BankHolder()
+        assert registry.acquire(name, a) is registry.acquire(name, b)
+        registry.release(name, a)
+        assert registry.held() == {name}
+        registry.release(name, b)
+        assert registry.held() == set()
+        assert registry.acquire(name, a) is not None
+
+    def test_ended_session_stops_holding(self, tmp_path):
+        name = compile_bank(_questions(), tmp_path)
+        registry = BankRegistry(str(tmp_path))
+        holder = BankHolder()
+        registry.acquire(name, holder)
+        del holder
+        gc.collect()
+        assert registry.held() == set()
+
+    def test_collect_unreferenced_files(self, tmp_path):
+        qs = _questions()
+        kept = compile_bank(qs, tmp_path)
+        stale = compile_bank(qs[:3], tmp_path)
+        fresh = compile_bank(qs[:6], tmp_path)
+        for name in (kept, stale):
+            os.utime(os.path.join(tmp_path, name), (0, 0))
+        assert collect_bank_files(str(tmp_path), {kept}, grace=3600) == 1
+        assert sorted(os.listdir(tmp_path)) == sorted([kept, fresh])
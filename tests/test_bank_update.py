@@ -0,0 +1,128 @@
+"""Unit tests for incremental re-import in bank_update.py"""
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank_store import CompiledBank, compile_bank
+from bank_update import diff_bank, updated_questions, apply_to_progress
+from progress import new_progress, new_exam
+from quiz_utils import build_questions
+
+TYPES = ["单选", "单选", "判断", "多选"]
+CONTENTS = ["一 A. 甲 B. 乙", "二 A. 甲 B. 乙", "三是对的", "四 A. 甲 B. 乙 C. 丙"]
+ANSWERS = ["A", "B", "对", "AC"]
+
+
+def _bank(tmp_path, keys=None):
+    qs, _ = build_questions(TYPES, CONTENTS, ANSWERS, keys=keys)
+    return CompiledBank(os.path.join(tmp_path, compile_bank(qs, tmp_path)))
+
+
+class TestDiffBank:
+    """Test cases for diff_bank."""
+
+    def test_identical(self, tmp_path):
+        bank = _bank(tmp_path)
+        diff = diff_bank(bank, build_questions(TYPES, CONTENTS, ANSWERS, lazy=True)[0])
+        assert diff.counts() == {"unchanged": 4, "changed": 0, "added": 0, "removed": 0}
+        bank.close()
+
+    def test_edit_in_place_insert_and_remove(self, tmp_path):
+        bank = _bank(tmp_path)
+        # row 0 inserted before everything, 二 fixed, 三 removed
+        types = ["判断", "单选", "单选", "多选"]
+        contents = ["新题", "一 A. 甲 B. 乙", "二 A. 甲 B. 乙丙", "四 A. 甲 B. 乙 C. 丙"]
+        answers = ["错", "A", "B", "AC"]
+        diff = diff_bank(bank, build_questions(types, contents, answers, lazy=True)[0])
+        assert diff.counts() == {"unchanged": 2, "changed": 1, "added": 1, "removed": 1}
+        status = {row[2]["raw_content"]: (row[0], row[1]) for row in diff.rows}
+        assert status["一 A. 甲 B. 乙"] == ("unchanged", 0)
+        assert status["四 A. 甲 B. 乙 C. 丙"] == ("unchanged", 3)
+        assert status["新题"][0] == "added"
+        assert status["新题"][1] == 4  # fresh ids never reuse an existing one
+        assert status["二 A. 甲 B. 乙丙"] == ("changed", 1)
+        assert diff.removed == [2]
+        bank.close()
+
+    def test_match_by_key(self, tmp_path):
+        bank = _bank(tmp_path, keys=["k1", "k2", "k3", "k4"])
+        contents = list(reversed(CONTENTS))
+        contents[0] = "四 改"
+        diff = diff_bank(bank, build_questions(list(reversed(TYPES)), contents, list(reversed(ANSWERS)),
+                                               keys=["k4", "k3", "k2", "k1"], lazy=True)[0])
+        assert [(row[0], row[1]) for row in diff.rows] == [
+            ("changed", 3), ("unchanged", 2), ("unchanged", 1), ("unchanged", 0)]
+        assert diff.removed == []
+        bank.close()
+
+
+    def test_insert_into_renumbered_keys(self, tmp_path):
+        # 序号 1-4 renumbered after a row is inserted as 2: content wins over the shifted keys
+        bank = _bank(tmp_path, keys=["1", "2", "3", "4"])
+        types = TYPES[:1] + ["单选"] + TYPES[1:]
+        contents = CONTENTS[:1] + ["新 A. 甲 B. 乙"] + CONTENTS[1:]
+        answers = ANSWERS[:1] + ["A"] + ANSWERS[1:]
+        diff = diff_bank(bank, build_questions(types, contents, answers, keys=["1", "2", "3", "4", "5"],
+                                               lazy=True)[0])
+        assert [(row[0], row[1]) for row in diff.rows] == [
+            ("unchanged", 0), ("added", 4), ("unchanged", 1), ("unchanged", 2), ("unchanged", 3)]
+        assert diff.removed == []
+        bank.close()
+
+    def test_keyed_workbook_edits_unkeyed_bank(self, tmp_path):
+        # bank imported before key columns were read: keyed rows still pair by position
+        bank = _bank(tmp_path)
+        contents = CONTENTS[:1] + ["二 A. 甲 B. 乙丙"] + CONTENTS[2:]
+        diff = diff_bank(bank, build_questions(TYPES, contents, ANSWERS, keys=["1", "2", "3", "4"],
+                                               lazy=True)[0])
+        assert [(row[0], row[1]) for row in diff.rows] == [
+            ("unchanged", 0), ("changed", 1), ("unchanged", 2), ("unchanged", 3)]
+        assert diff.removed == []
+        bank.close()
+
+    def test_key_match_requires_same_type(self, tmp_path):
+        # k3 moves to the top and turns into a different single-choice question: not the old 三
+        bank = _bank(tmp_path, keys=["k1", "k2", "k3", "k4"])
+        types = ["单选"] + TYPES[:2] + TYPES[3:]
+        contents = ["三 改成单选 A. 甲 B. 乙"] + CONTENTS[:2] + CONTENTS[3:]
+        answers = ["A"] + ANSWERS[:2] + ANSWERS[3:]
+        diff = diff_bank(bank, build_questions(types, contents, answers, keys=["k3", "k1", "k2", "k4"],
+                                               lazy=True)[0])
+        assert diff.rows[0][0] == "added"
+        assert diff.removed == [2]
+        bank.close()
+
+class TestApplyUpdate:
+    """Test cases for updated_questions and apply_to_progress."""
+
+    def test_updated_questions_parse_only_changes(self, tmp_path):
+        bank = _bank(tmp_path)
+        contents = CONTENTS[:1] + ["二 A. 丁 B. 戊"] + CONTENTS[2:3]
+        diff = diff_bank(bank, build_questions(TYPES[:3], contents, ANSWERS[:3], lazy=True)[0])
+        new_qs = updated_questions(bank, diff)
+        assert [q["id"] for q in new_qs] == [0, 1, 2]
+        assert new_qs[1]["options"] == {"A": "丁", "B": "戊"}
+        assert new_qs[0]["options"] == {"A": "甲", "B": "乙"}
+        updated = CompiledBank(os.path.join(tmp_path, compile_bank(new_qs, tmp_path)))
+        assert len(updated) == 3
+        updated.close()
+        bank.close()
+
+    def test_progress_carries_over(self, tmp_path):
+        bank = _bank(tmp_path)
+        pg = new_progress()
+        for qid in range(4):
+            pg["answers"].record(qid, "A", qid == 0)
+            pg["wrong"][qid] = "A"
+        pg["exam"] = new_exam([0, 3], seed=1, quotas={})
+        diff = diff_bank(bank, build_questions(TYPES[:3], CONTENTS[:3], ANSWERS[:3], lazy=True)[0])
+        version = pg["wrong_version"]
+        apply_to_progress(pg, diff)
+        assert list(pg["wrong"]) == [0, 1, 2]
+        assert pg["wrong_version"] != version
+        assert pg["answers"].is_correct(0)
+        assert not pg["answers"].is_answered(3)
+        assert pg["exam"]["ids"] == [0]
+        bank.close()
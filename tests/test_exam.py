@@ -0,0 +1,60 @@
+"""Unit tests for stratified exam generation in exam.py"""
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exam import draw_stratified, reservoir_stratified, exam_score
+from progress import new_exam, new_progress, dump_progress, load_progress
+
+POOLS = {"AO": range(0, 100), "BO": range(100, 300), "CO": range(300, 310)}
+
+
+class TestDrawStratified:
+    """Test cases for draw_stratified."""
+
+    def test_quotas_per_type(self):
+        picked = draw_stratified(POOLS, {"AO": 5, "BO": 10, "CO": 3}, seed=1)
+        assert len(picked) == 18
+        assert len(set(picked)) == 18
+        assert sum(p < 100 for p in picked) == 5
+        assert sum(300 <= p for p in picked) == 3
+
+    def test_reproducible(self):
+        quotas = {"BO": 7, "AO": 4}
+        assert draw_stratified(POOLS, quotas, seed=42) == draw_stratified(POOLS, quotas, seed=42)
+        assert draw_stratified(POOLS, quotas, seed=42) != draw_stratified(POOLS, quotas, seed=43)
+
+    def test_type_order_and_clamping(self):
+        picked = draw_stratified(POOLS, {"CO": 50, "AO": 1}, seed=0)
+        assert picked[0] < 100
+        assert len(picked) == 11
+
+    def test_missing_type(self):
+        assert draw_stratified({"AO": range(5)}, {"BO": 3}, seed=0) == []
+
+
+class TestReservoirStratified:
+    """Test cases for reservoir_stratified."""
+
+    def test_quotas_from_stream(self):
+        stream = [("AO" if i % 2 else "BO", i) for i in range(1000)]
+        ids = reservoir_stratified(iter(stream), {"AO": 5, "BO": 3}, seed=7)
+        assert len(ids) == 8
+        assert all(i % 2 for i in ids[:5])
+        assert ids == reservoir_stratified(iter(stream), {"AO": 5, "BO": 3}, seed=7)
+
+
+class TestExamRecord:
+    """Test cases for exam records stored in progress."""
+
+    def test_score_and_round_trip(self):
+        pg = new_progress()
+        pg["exam"] = new_exam([3, 8, 9], seed=5, quotas={"AO": 3})
+        pg["exam"]["answers"].record(8, "A", True)
+        pg["exam"]["answers"].record(9, "B", False)
+        restored = load_progress(dump_progress(pg))
+        assert restored["exam"]["ids"] == [3, 8, 9]
+        assert exam_score(restored["exam"]) == (1, 3)
+        assert load_progress(dump_progress(new_progress()))["exam"] is None
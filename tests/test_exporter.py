@@ -0,0 +1,91 @@
+"""Unit tests for streaming exports in exporter.py"""
+import sys
+import os
+import csv
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank_store import CompiledBank, compile_bank
+from exporter import (BANK_HEADER, RESULT_HEADER, WRONG_HEADER, export_to_file, prune_exports,
+                      bank_rows, result_rows, wrong_rows)
+from progress import BankProgress
+from quiz_utils import build_questions
+
+
+@pytest.fixture
+def bank(tmp_path):
+    qs, _ = build_questions(["判断", "单选", "多选"], ["甲", "乙 A. 1 B. 2", "丙 A. 1 B. 2 C. 3"], ["对", "B", "AC"])
+    b = CompiledBank(os.path.join(tmp_path, compile_bank(qs, tmp_path)))
+    yield b
+    b.close()
+
+
+class TestRows:
+    """Test cases for the lazy row sources."""
+
+    def test_bank_rows(self, bank):
+        rows = list(bank_rows(bank))
+        assert len(rows) == 3
+        assert len(rows[0]) == len(BANK_HEADER)
+        assert [r[0] for r in bank_rows(bank, [2])] == [2]
+
+    def test_result_rows(self, bank):
+        answers = BankProgress()
+        answers.record(1, "B", True)
+        answers.record(2, "A", False)
+        rows = list(result_rows(bank, answers))
+        assert [r[-1] for r in rows] == ["未作答", "正确", "错误"]
+        assert len(rows[0]) == len(RESULT_HEADER)
+
+    def test_wrong_rows_skip_missing_ids(self, bank):
+        rows = list(wrong_rows(bank, {2: "A", 99: "B"}))
+        assert rows == [["多选题", "丙 A. 1 B. 2 C. 3", "AC", "A"]]
+
+
+class TestExportToFile:
+    """Test cases for the file writers."""
+
+    def test_csv(self, bank):
+        path = export_to_file("csv", WRONG_HEADER, wrong_rows(bank, {0: "B"}))
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                rows = list(csv.reader(f))
+            assert rows[0] == WRONG_HEADER
+            assert rows[1][3] == "B"
+        finally:
+            os.remove(path)
+
+    def test_xlsx(self, bank):
+        pytest.importorskip("xlsxwriter")
+        path = export_to_file("xlsx", BANK_HEADER, bank_rows(bank))
+        try:
+            assert os.path.getsize(path) > 0
+        finally:
+            os.remove(path)
+
+    def test_parquet(self, bank):
+        pq = pytest.importorskip("pyarrow.parquet")
+        path = export_to_file("parquet", BANK_HEADER, bank_rows(bank))
+        try:
+            assert pq.read_table(path).num_rows == 3
+        finally:
+            os.remove(path)
+
+    def test_unknown_format(self, bank):
+        with pytest.raises(ValueError):
+            export_to_file("pdf", BANK_HEADER, [])
+
+    def test_prune_by_age(self, bank, tmp_path):
+        old = export_to_file("csv", BANK_HEADER, bank_rows(bank), directory=tmp_path)
+        new = export_to_file("csv", BANK_HEADER, bank_rows(bank), directory=tmp_path)
+        other = tmp_path / "notes.txt"
+        other.write_text("keep")
+        os.utime(old, (0, 0))
+        os.utime(other, (0, 0))
+        assert prune_exports(tmp_path, max_age=3600) == 1
+        assert not os.path.exists(old)
+        assert os.path.exists(new) and other.exists()
+        assert prune_exports(tmp_path / "missing", max_age=0) == 0
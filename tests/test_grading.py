@@ -0,0 +1,41 @@
+"""Unit tests for page grading in grading.py"""
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank_store import CompiledBank, compile_bank
+from grading import grade_page
+from quiz_utils import build_questions
+
+
+def _bank(tmp_path):
+    types = ["判断", "单选", "多选", "填空"]
+    contents = ["地球是圆的", "1+1=? A. 1 B. 2", "质数有 A. 2 B. 4 C. 5", "中国的首都是"]
+    answers = ["对", "B", "A,C", "北京"]
+    qs, _ = build_questions(types, contents, answers)
+    return CompiledBank(os.path.join(tmp_path, compile_bank(qs, tmp_path)))
+
+
+class TestGradePage:
+    """Test cases for grade_page."""
+
+    def test_correct_page(self, tmp_path):
+        bank = _bank(tmp_path)
+        normalized, results = grade_page(bank, range(4), ["正确", "b", "CA", "北京"])
+        assert normalized[:3] == ["A", "B", "AC"]
+        assert results == [True, True, True, True]
+        bank.close()
+
+    def test_wrong_and_unanswered(self, tmp_path):
+        bank = _bank(tmp_path)
+        _, results = grade_page(bank, [3, 2, 1, 0], ["上海", "A", "", None])
+        assert results == [False, False, None, None]
+        bank.close()
+
+    def test_free_text_key_vs_letter_choice(self, tmp_path):
+        bank = _bank(tmp_path)
+        assert bank.answer_masks[3] == 0
+        assert grade_page(bank, [3, 1], ["A", "北京"])[1] == [False, False]
+        bank.close()
@@ -0,0 +1,64 @@
+"""Unit tests for column detection and row parsing in quiz_utils.py"""
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_utils import find_column, detect_columns, classify_type, build_questions
+
+
+class TestDetectColumns:
+    """Test cases for find_column / detect_columns."""
+
+    def test_chinese_headers(self):
+        cols, missing = detect_columns(["题型", "题目", "正确答案"])
+        assert cols == ("题型", "题目", "正确答案")
+        assert missing == []
+
+    def test_case_insensitive(self):
+        assert find_column(["QUESTION TEXT"], ["question"]) == "QUESTION TEXT"
+
+    def test_missing_columns(self):
+        cols, missing = detect_columns(["类型", "备注"])
+        assert cols[0] == "类型"
+        assert len(missing) == 2
+
+
+class TestClassifyType:
+    """Test cases for classify_type function."""
+
+    def test_codes(self):
+        assert classify_type("判断") == ('AO', '判断题')
+        assert classify_type("single") == ('BO', '单选题')
+        assert classify_type("多选题") == ('CO', '多选题')
+
+    def test_unknown(self):
+        assert classify_type("填空") == ('UNK', '未知')
+
+
+class TestBuildQuestions:
+    """Test cases for build_questions function."""
+
+    def test_basic_rows(self):
+        qs, skipped = build_questions(["单选", "判断"], ["题目 A. 一 B. 二", "天是蓝的"], ["a", "对"])
+        assert skipped == 0
+        assert [q["id"] for q in qs] == [0, 1]
+        assert qs[0]["options"] == {"A": "一", "B": "二"}
+        assert qs[1]["answer"] == "A"
+        assert "chapter" not in qs[0]
+
+    def test_skips_empty_rows_but_keeps_row_ids(self):
+        qs, skipped = build_questions(["单选"] * 3, ["Q1", "  ", "Q3"], ["A", "B", "C"])
+        assert skipped == 1
+        assert [q["id"] for q in qs] == [0, 2]
+
+    def test_chapter_and_offset(self):
+        qs, _ = build_questions(["判断"], ["Q"], ["错"], id_offset=100, chapter="第一章")
+        assert qs[0]["id"] == 100
+        assert qs[0]["chapter"] == "第一章"
+
+    def test_progress_callback(self):
+        calls = []
+        build_questions(["判断"] * 20, ["Q"] * 20, ["对"] * 20, on_progress=lambda d, t: calls.append((d, t)))
+        assert calls and all(t == 20 for _, t in calls)
@@ -6,7 +6,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import functions from quiz_utils module
-from quiz_utils import normalize_text, normalize_answer, parse_options_zen
+from quiz_utils import normalize_text, normalize_answer, parse_options_zen, parse_options_lazy
 
 
 class TestNormalizeText:
@@ -174,11 +174,25 @@ class TestParseOptionsZen:
         assert opts == {} or len(opts) < 2
 
 
+class TestParseOptionsLazy:
+    """Test cases for the cached parse_options_lazy wrapper."""
+
+    def test_matches_parse_options_zen(self):
+        text = "问题内容? A、选项1 B、选项2 C、选项3"
+        assert parse_options_lazy(text) == parse_options_zen(text)
+
+    def test_returns_fresh_dict(self):
+        text = "题目 A. 一 B. 二"
+        _, opts = parse_options_lazy(text)
+        opts["Z"] = "mutated"
+        assert "Z" not in parse_options_lazy(text)[1]
+
+
 def run_tests():
     """Run all tests and print results."""
     import traceback
     
-    test_classes = [TestNormalizeText, TestNormalizeAnswer, TestParseOptionsZen]
+    test_classes = [TestNormalizeText, TestNormalizeAnswer, TestParseOptionsZen, TestParseOptionsLazy]
     total_tests = 0
     passed_tests = 0
     failed_tests = []
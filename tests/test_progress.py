@@ -0,0 +1,105 @@
+"""Unit tests for bitset progress tracking in progress.py"""
+import sys
+import os
+import json
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from progress import (BankProgress, choice_to_mask, mask_to_choice, new_progress, dump_progress, load_progress,
+                      add_wrong, clear_wrong)
+
+
+class TestChoiceMask:
+    """Test cases for packed answer encoding."""
+
+    def test_round_trip(self):
+        for choice in ["A", "B", "ACD", "ABCDEFGH"]:
+            assert mask_to_choice(choice_to_mask(choice)) == choice
+
+    def test_unpackable(self):
+        assert choice_to_mask("") == 0
+        assert choice_to_mask("BA") == 0
+        assert choice_to_mask("Z") == 0
+
+
+class TestBankProgress:
+    """Test cases for BankProgress."""
+
+    def test_record_and_query(self):
+        p = BankProgress()
+        p.record(5, "AC", True)
+        p.record(1000, "B", False)
+        assert p.choice(5) == "AC"
+        assert p.is_correct(5) and not p.is_correct(1000)
+        assert p.is_answered(1000) and not p.is_answered(6)
+        assert p.choice(6) is None
+        assert p.answered_count() == 2
+        assert p.correct_count() == 1
+
+    def test_rerecord_clears_correct(self):
+        p = BankProgress()
+        p.record(3, "A", True)
+        p.record(3, "B", False)
+        assert not p.is_correct(3)
+        assert p.correct_count() == 0
+
+    def test_free_text_answer(self):
+        p = BankProgress()
+        p.record(2, "XYZ", False)
+        assert p.choice(2) == "XYZ"
+        p.record(2, "A", True)
+        assert p.choice(2) == "A"
+        assert p.extra == {}
+
+    def test_forget(self):
+        p = BankProgress()
+        p.record(9, "A", True)
+        p.forget(9)
+        assert not p.is_answered(9)
+        assert p.answered_count() == 0
+
+    def test_persisted_size_is_compact(self):
+        p = BankProgress()
+        p.record(99_999, "A", True)
+        for qid in range(0, 100_000, 97):
+            p.record(qid, "B", qid % 2 == 0)
+        data = json.dumps(p.to_dict())
+        assert len(data) < 8 * 1024
+        restored = BankProgress.from_dict(json.loads(data))
+        assert restored.choice(97) == "B"
+        assert restored.is_correct(99_999)
+        assert restored.answered_count() == p.answered_count()
+
+
+class TestProgressSerialization:
+    """Test cases for dump_progress / load_progress."""
+
+    def test_round_trip_keeps_wrong_order(self):
+        pg = new_progress()
+        pg["answers"].record(7, "B", False)
+        pg["wrong"][7] = "B"
+        pg["wrong"][2] = "XY"
+        pg["current_idx"] = 4
+        restored = load_progress(json.loads(json.dumps(dump_progress(pg))))
+        assert list(restored["wrong"].items()) == [(7, "B"), (2, "XY")]
+        assert restored["current_idx"] == 4
+        assert restored["answers"].choice(7) == "B"
+
+    def test_wrong_version_changes_on_every_edit(self):
+        pg = new_progress()
+        versions = [pg["wrong_version"]]
+        add_wrong(pg, 3, "A")
+        versions.append(pg["wrong_version"])
+        add_wrong(pg, 3, "B")  # already in the book: first wrong answer kept
+        assert pg["wrong"] == {3: "A"} and pg["wrong_version"] == versions[-1]
+        clear_wrong(pg)
+        versions.append(pg["wrong_version"])
+        add_wrong(pg, 5, "C")  # same count as before clearing, new version
+        versions.append(pg["wrong_version"])
+        assert len(set(versions)) == 4
+
+    def test_empty(self):
+        pg = load_progress({})
+        assert pg["wrong"] == {}
+        assert pg["answers"].answered_count() == 0
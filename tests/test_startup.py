@@ -0,0 +1,49 @@
+"""Guards that keep the tabular stack off app1.py's cold-start path."""
+import ast
+import os
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app1.py")
+HEAVY_MODULES = {"pandas", "xlsxwriter", "openpyxl"}
+
+
+def _module_level_imports(tree):
+    """Yield top-level module names imported outside any function body."""
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            continue
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield node, alias.name.split('.')[0]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            yield node, node.module.split('.')[0]
+
+
+def _function_nodes(tree):
+    return [n for n in ast.walk(tree) if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+
+
+class TestLazyImports:
+    """app1.py must only import heavy modules inside the functions that need them."""
+
+    def setup_method(self):
+        with open(APP_PATH, encoding="utf-8") as f:
+            self.tree = ast.parse(f.read())
+
+    def test_no_heavy_module_level_imports(self):
+        nested = set()
+        for fn in _function_nodes(self.tree):
+            for node in ast.walk(fn):
+                if isinstance(node, (ast.Import, ast.ImportFrom)):
+                    nested.add(id(node))
+        offenders = [name for node, name in _module_level_imports(self.tree)
+                     if name in HEAVY_MODULES and id(node) not in nested]
+        assert offenders == []
+
+    def test_no_module_level_pd_alias(self):
+        # A stray `pd.` at module level would fail at runtime once the import is lazy
+        for node in self.tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            for sub in ast.walk(node):
+                if isinstance(sub, ast.Name):
+                    assert sub.id != "pd"
@@ -0,0 +1,63 @@
+"""Unit tests for incremental statistics in stats.py"""
+import sys
+import os
+import csv
+import io
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stats import QuizStats, SESSION_GAP, MAX_ANSWER_SECONDS, export_stats_csv
+
+
+class TestQuizStats:
+    """Test cases for QuizStats aggregates."""
+
+    def test_per_type_accuracy_and_pace(self):
+        s = QuizStats()
+        s.record("BO", True, 4, now=0)
+        s.record("BO", False, 6, now=10)
+        s.record("AO", True, 2, now=20)
+        assert s.totals() == (3, 2, 12.0)
+        assert s.accuracy("BO") == 0.5
+        assert s.avg_seconds("BO") == 5.0
+        assert s.accuracy("CO") == 0.0
+
+    def test_streaks(self):
+        s = QuizStats()
+        for hit in [True, True, True, False, True]:
+            s.record("AO", hit, 1, now=0)
+        assert s.streak == 1
+        assert s.best_streak == 3
+
+    def test_sessions_split_on_gap(self):
+        s = QuizStats()
+        s.record("AO", True, 1, now=0)
+        s.record("AO", True, 1, now=60)
+        s.record("AO", False, 1, now=60 + SESSION_GAP + 1)
+        assert len(s.sessions) == 2
+        assert s.sessions[0][2] == 2
+        assert [row[2] for row in s.session_rows(limit=1)] == [1]
+
+    def test_time_is_capped(self):
+        s = QuizStats()
+        s.record("AO", True, 10 * MAX_ANSWER_SECONDS, now=0)
+        assert s.avg_seconds() == MAX_ANSWER_SECONDS
+
+    def test_round_trip(self):
+        s = QuizStats()
+        s.record("CO", False, 3, now=5)
+        restored = QuizStats.from_dict(s.to_dict())
+        assert restored.type_rows() == s.type_rows()
+        assert restored.sessions == s.sessions
+
+
+class TestStatsExport:
+    """Test cases for CSV export."""
+
+    def test_csv(self):
+        s = QuizStats()
+        s.record("BO", True, 3, now=0)
+        rows = list(csv.reader(io.StringIO(export_stats_csv(s).decode("utf-8-sig"))))
+        assert rows[0][0] == "题型"
+        assert rows[1] == ["单选题", "1", "1", "100.0", "3.0"]
@@ -0,0 +1,73 @@
+"""Unit tests for virtual study sets in study_set.py"""
+import sys
+import os
+import json
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank_store import CompiledBank, compile_bank
+from grading import grade_page
+from quiz_utils import build_questions
+from study_set import MergedView, new_study_set, drop_member
+
+
+def _bank(tmp_path, n, prefix):
+    types = ["判断", "单选", "多选"] * (n // 3)
+    contents = [f"{prefix}{i} A. 甲 B. 乙 C. 丙" for i in range(len(types))]
+    answers = ["对", "B", "AC"] * (n // 3)
+    qs, _ = build_questions(types, contents, answers)
+    return CompiledBank(os.path.join(tmp_path, compile_bank(qs, tmp_path)))
+
+
+@pytest.fixture
+def banks(tmp_path):
+    banks = {"一": _bank(tmp_path, 9, "甲"), "二": _bank(tmp_path, 30, "乙")}
+    yield banks
+    for bank in banks.values():
+        bank.close()
+
+
+class TestMergedView:
+    """Test cases for MergedView."""
+
+    def test_concatenates_filtered_members(self, banks):
+        view = MergedView(banks, [["一", None], ["二", ["单选题"]]])
+        assert len(view) == 9 + 10
+        assert view[0]["bank"] == "一" and view[0]["id"] == 0
+        assert view[8]["id"] == 8
+        q = view[9]
+        assert (q["bank"], q["id"], q["code"]) == ("二", 1, "BO")
+        assert view[-1]["id"] == 28
+        with pytest.raises(IndexError):
+            view[len(view)]
+
+    def test_ids_stay_per_source(self, banks):
+        view = MergedView(banks, [["一", None], ["二", None]])
+        assert [(q["bank"], q["id"]) for q in view][8:10] == [("一", 8), ("二", 0)]
+
+    def test_missing_bank_skipped(self, banks):
+        view = MergedView(banks, [["已删除", None], ["一", ["判断题"]]])
+        assert view.names == ["一"]
+        assert len(view) == 3
+
+    def test_grades_through_view(self, banks):
+        view = MergedView(banks, [["一", ["多选题"]], ["二", ["判断题"]]])
+        assert grade_page(view, [0, 3, 4], ["AC", "对", "B"])[1] == [True, True, False]
+
+
+class TestStudySetState:
+    """Test cases for study set persistence helpers."""
+
+    def test_size_independent_of_banks(self):
+        s = new_study_set([("一", None), ("二", ["单选题"])])
+        assert s == {"members": [["一", None], ["二", ["单选题"]]], "current_idx": 0}
+        assert json.loads(json.dumps(s, ensure_ascii=False)) == s
+
+    def test_drop_member(self):
+        sets = {"a": new_study_set([("一", None), ("二", None)]), "b": new_study_set([("一", None)])}
+        drop_member(sets, "一")
+        assert list(sets) == ["a"]
+        assert sets["a"]["members"] == [["二", None]]